@@ -0,0 +1,174 @@
+# benchmark suite for the map, the planner, the predictor and end-to-end mission throughput
+#
+# Usage:
+#     bin/featurebench --output bench.json
+#     bin/featurebench --baseline bench.json --threshold 0.2  # exit with status 1 on a regression over 20%
+
+from src.obj.map import Coord, Map
+from src.mission.checkpoint import Checkpoint_Mission
+from typing import Callable, NamedTuple, Optional, TextIO
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+import numpy as np
+
+DEFAULT_REPEAT = 5  # number of timed repetitions of every benchmark, the best one is reported
+MIN_REPETITION_TIME = 0.05  # seconds, the number of calls per repetition is calibrated to last at least this long
+DEFAULT_THRESHOLD = 0.2  # relative slowdown over the baseline reported as a regression
+
+
+class Benchmark(NamedTuple):
+    """a named benchmark, setup() builds the objects and returns the function timed (called without arguments)"""
+    name: str
+    setup: Callable[[], Callable[[], object]]
+
+
+def _mission(width: int, height: int) -> Checkpoint_Mission:
+    """the demo mission, scaled to the map size"""
+    return Checkpoint_Mission(map_width=width, map_height=height, ego_init_loc=Coord(1, height // 2),
+                              chaser_init_loc=Coord(1, 1),
+                              checkpoints=[Coord(width // 2, height - 1), Coord(width - 1, 1)])
+
+
+def _map_construction(size: int) -> Callable[[], object]:
+    return lambda: Map(size, size)
+
+
+def _neighbor_table(size: int) -> Callable[[], object]:
+    return lambda: Map(size, size).neighbor_table()  # the table is cached by the map, hence a new map every call
+
+
+def _find_neighbors_8(size: int) -> Callable[[], object]:
+    map = Map(size, size)
+    map_cell = map.map_cell(Coord(size // 2, size // 2))
+    return lambda: map.find_neighbors_8(map_cell)
+
+
+def _state_planner(size: int) -> Callable[[], object]:
+    cm = _mission(size, size)
+    cm.init()
+    ego_cell, chaser_cell = cm.map.map_cell(cm.ego_init_loc), cm.map.map_cell(cm.chaser_init_loc)
+    return lambda: cm.state_planner(ego_curr_cell=ego_cell, chaser_curr_cell=chaser_cell, ego_heading=cm.checkpoints[0])
+
+
+def _signal_predictor(size: int, pred_step: int) -> Callable[[], object]:
+    cm = _mission(size, size)
+    cm.init()
+
+    def predict():
+        # cold prediction, the rollout cache would otherwise answer every call after the first one
+        cm.clear_rollout_cache()
+        return cm.signal_predictor(ego_heading=cm.checkpoints[0], pred_step=pred_step)
+
+    return predict
+
+
+def _execute(size: int, pred_step: int) -> Callable[[], object]:
+    cm = _mission(size, size)
+    return lambda: cm.run(max_step=4 * size, pred_step=pred_step)
+
+
+BENCHMARKS: list[Benchmark] = \
+    [Benchmark("map_construction[" + str(size) + "x" + str(size) + "]", lambda size=size: _map_construction(size))
+     for size in (20, 100, 1000)] + \
+    [Benchmark("map_neighbor_table[" + str(size) + "x" + str(size) + "]", lambda size=size: _neighbor_table(size))
+     for size in (100, 1000)] + \
+    [Benchmark("find_neighbors_8[100x100]", lambda: _find_neighbors_8(100)),
+     Benchmark("state_planner[20x20]", lambda: _state_planner(20))] + \
+    [Benchmark("signal_predictor[pred_step=" + str(pred_step) + "]",
+               lambda pred_step=pred_step: _signal_predictor(100, pred_step))
+     for pred_step in (4, 16, 64)] + \
+    [Benchmark("execute[" + str(size) + "x" + str(size) + ",pred_step=" + str(pred_step) + "]",
+               lambda size=size, pred_step=pred_step: _execute(size, pred_step))
+     for size, pred_step in ((20, 4), (100, 16))]
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = DEFAULT_REPEAT) -> dict:
+    """time the benchmark, return the per-call time statistics (in seconds) over the repetitions"""
+    func = benchmark.setup()
+    timer = timeit.Timer(func)
+
+    # calibrate the number of calls per repetition, so that short benchmarks are not dominated by timer resolution
+    number = 1
+    while timer.timeit(number) < MIN_REPETITION_TIME and number < 10 ** 6:
+        number *= 10
+
+    times = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {"best": min(times), "median": statistics.median(times), "number": number, "repeat": repeat}
+
+
+def run_benchmarks(benchmarks: list[Benchmark], repeat: int = DEFAULT_REPEAT, log: Optional[TextIO] = None) -> dict:
+    """run every benchmark, return the machine-readable report"""
+    results = dict()
+    for benchmark in benchmarks:
+        results[benchmark.name] = run_benchmark(benchmark, repeat=repeat)
+        if log is not None:
+            log.write("%-45s %12.3f us\n" % (benchmark.name, results[benchmark.name]["best"] * 1e6))
+
+    return {"timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "results": results}
+
+
+def compare(report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> dict[str, float]:
+    """relative change of the best time of every benchmark present in both reports (0.1 is 10% slower), return the
+    regressions, i.e. the changes over the threshold"""
+    regressions = dict()
+    for name, result in report["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is not None and baseline_result["best"] > 0:
+            change = result["best"] / baseline_result["best"] - 1
+            if change > threshold:
+                regressions[name] = change
+
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="benchmark suite for map, planner, predictor and mission throughput")
+    parser.add_argument("--filter", nargs="+", default=None, help="only run the benchmarks whose name contains any")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="number of timed repetitions")
+    parser.add_argument("--output", default=None, help="write the JSON report to the file (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown over the baseline reported as a regression")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    benchmarks = [benchmark for benchmark in BENCHMARKS
+                  if args.filter is None or any(pattern in benchmark.name for pattern in args.filter)]
+
+    if args.list:
+        for benchmark in benchmarks:
+            print(benchmark.name)
+        return 0
+
+    report = run_benchmarks(benchmarks, repeat=args.repeat, log=sys.stderr)
+
+    if args.output is not None:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), threshold=args.threshold)
+
+        for name, change in regressions.items():
+            sys.stderr.write("REGRESSION %-34s %+.1f%%\n" % (name, change * 100))
+
+        return 1 if len(regressions) > 0 else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# opt-in instrumentation: phase timers and counters, aggregated over runs and exported as JSON or CSV
+#
+# Usage:
+#     instrument = Instrument()
+#     Checkpoint_Mission(..., instrument=instrument).run()
+#     instrument.export("mission_profile.json")
+
+from typing import Optional, TextIO, Union
+import csv
+import json
+import time
+
+
+class _Phase:
+    """timer of one named phase, reused by every entry of the phase (phases of the same name may not nest)"""
+    __slots__ = ("instrument", "name", "begin")
+
+    def __init__(self, instrument: 'Instrument', name: str):
+        self.instrument = instrument
+        self.name = name
+        self.begin = 0.0
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrument.add_time(self.name, time.perf_counter() - self.begin)
+        return False
+
+
+class _Null_Phase:
+    """phase of the null instrument, entering and exiting it does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Instrument:
+    """accumulate the time spent in named phases (total and number of entries) and named counters
+
+    Usage:
+        >>> instrument = Instrument()
+        >>> with instrument.phase("plan"):
+        ...     pass
+        >>> instrument.count("steps", 2)
+        >>> instrument.calls["plan"], instrument.counters["steps"]
+        (1, 2)
+    """
+    enabled = True
+
+    def __init__(self):
+        self.timings_val: dict[str, float] = dict()  # phase -> total seconds
+        self.calls_val: dict[str, int] = dict()  # phase -> number of entries
+        self.counters_val: dict[str, int] = dict()  # counter -> value
+        self._phases: dict[str, _Phase] = dict()
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def timings(self) -> dict[str, float]:
+        return self.timings_val
+
+    @property
+    def calls(self) -> dict[str, int]:
+        return self.calls_val
+
+    @property
+    def counters(self) -> dict[str, int]:
+        return self.counters_val
+
+    ###################
+    # instrumentation #
+    ###################
+
+    def phase(self, name: str) -> _Phase:
+        """context manager timing the enclosed block as the named phase"""
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+
+        return phase
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.timings_val[name] = self.timings_val.get(name, 0.0) + seconds
+        self.calls_val[name] = self.calls_val.get(name, 0) + 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters_val[name] = self.counters_val.get(name, 0) + value
+
+    def merge(self, other: 'Instrument') -> None:
+        """aggregate the timings and counters of another instrument (e.g. of another run or process) into this one"""
+        for name, seconds in other.timings.items():
+            self.timings_val[name] = self.timings_val.get(name, 0.0) + seconds
+            self.calls_val[name] = self.calls_val.get(name, 0) + other.calls[name]
+
+        for name, value in other.counters.items():
+            self.count(name, value)
+
+    def reset(self) -> None:
+        self.timings_val.clear()
+        self.calls_val.clear()
+        self.counters_val.clear()
+
+    #############
+    # reporting #
+    #############
+
+    def report(self) -> dict:
+        """aggregated report: per phase total and mean seconds, number of entries and share of the instrumented time,
+        and the counters"""
+        total = sum(self.timings_val.values())
+
+        return {"total": total,
+                "phases": {name: {"total": seconds,
+                                  "calls": self.calls_val[name],
+                                  "mean": seconds / self.calls_val[name],
+                                  "share": seconds / total if total > 0 else 0.0}
+                           for name, seconds in sorted(self.timings_val.items(), key=lambda item: -item[1])},
+                "counters": dict(sorted(self.counters_val.items()))}
+
+    def export(self, file: Union[str, TextIO], format: Optional[str] = None) -> None:
+        """write the report as JSON (the report dictionary) or CSV (one row per phase and per counter), the format
+        defaults to the extension of the file path, JSON otherwise"""
+        if format is None:
+            format = "csv" if isinstance(file, str) and file.endswith(".csv") else "json"
+
+        if isinstance(file, str):
+            with open(file, "w", newline="") as output:
+                self.export(output, format=format)
+            return
+
+        report = self.report()
+        if format == "json":
+            json.dump(report, file, indent=2)
+        elif format == "csv":
+            writer = csv.writer(file)
+            writer.writerow(["kind", "name", "total", "calls", "mean", "share"])
+            for name, phase in report["phases"].items():
+                writer.writerow(["phase", name, phase["total"], phase["calls"], phase["mean"], phase["share"]])
+            for name, value in report["counters"].items():
+                writer.writerow(["counter", name, value, "", "", ""])
+        else:
+            raise RuntimeError("unknown export format \"" + format + "\"")
+
+
+class Null_Instrument(Instrument):
+    """instrument doing nothing, the default of the missions: the instrumentation costs a method call per phase"""
+    enabled = False
+
+    _null_phase = _Null_Phase()
+
+    def phase(self, name: str) -> _Null_Phase:
+        return self._null_phase
+
+    def add_time(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+
+NULL_INSTRUMENT = Null_Instrument()  # shared null instrument
@@ -3,9 +3,18 @@
 
 from src.obj.map import Coord, Map, Map_Cell
 from src.obj.drone import Drone
-from src.obj.visualizer import Visualizer
-from stl.api import Signal, STL
-from typing import Tuple, Optional
+from src.obj.trajectory import Trajectory
+from src.mission.planner import OBSTACLE_LAYER, Greedy_Planner, Planner
+from stl.api import STL
+from src.mission.property import DEFAULT_ROBUSTNESS, batch_eval, boundary_props, compile_props
+from src.mission.result import Conflict_Result, Mission_Result, Step_Record
+from src.mission.monitor import Boundary_Monitor
+from src.instrument import NULL_INSTRUMENT, Instrument
+from typing import Iterator, Tuple, Optional, Union
+from collections import OrderedDict
+import numpy as np
+
+ROLLOUT_CACHE_SIZE = 4096  # maximum number of memoized prediction rollouts kept by a mission (LRU eviction)
 
 
 class Checkpoint_Mission:
@@ -16,19 +25,43 @@ class Checkpoint_Mission:
                  map_height: int,
                  ego_init_loc: Coord,
                  chaser_init_loc: Coord,
-                 checkpoints: list[Coord]):
+                 checkpoints: list[Coord],
+                 planner: Optional[Planner] = None,
+                 obstacles: Optional[list[Coord]] = None,
+                 instrument: Optional[Instrument] = None,
+                 monitor: bool = False):
 
         self.map_width_val = map_width
         self.map_height_val = map_height
         self.ego_init_loc_val = ego_init_loc
         self.chaser_init_loc_val = chaser_init_loc
         self.checkpoints_val = checkpoints
+        # planner backend, greedy by default: for the two drones of the mission, one batched greedy step is cheaper than
+        # splitting them between a distance field and a greedy step (see Field_Planner)
+        self.planner_val: Planner = planner if planner is not None else Greedy_Planner()
+        self.obstacles_val: list[Coord] = list(obstacles) if obstacles is not None else list()  # blocked cells
+        # phase timers and counters of the execution, off (the null instrument) by default
+        self.instrument_val: Instrument = instrument if instrument is not None else NULL_INSTRUMENT
+        # evaluate the default boundary properties with online monitors over the sliding prediction windows
+        self.monitor_val = monitor
 
         # initialize all internal objects to None
         self._map: Optional[Map] = None
         self._ego_drone: Optional[Drone] = None
         self._chaser_drone: Optional[Drone] = None
 
+        # memoized prediction rollouts, (ego index, chaser index, heading index, horizon) -> (ego indices, chaser
+        # indices), and the most recent rollout, whose suffix is reused by the next incremental rollout
+        self._rollout_cache: OrderedDict[Tuple[int, int, int, int], Tuple[Tuple[int, ...], Tuple[int, ...]]] = \
+            OrderedDict()
+        self._last_rollout: Optional[Tuple[Tuple[int, int, int, int], Tuple[Tuple[int, ...], Tuple[int, ...]]]] = None
+        self._rollout_version = -1  # map version the memoized rollouts were planned on
+
+        # per-step evaluation records of the last execution: min robustness over both drones, and whether a feature
+        # conflict (property violation for either drone) was predicted
+        self.step_robustness_val: list[float] = list()
+        self.step_conflict_val: list[bool] = list()
+
     ###########
     # getters #
     ###########
@@ -53,6 +86,34 @@ class Checkpoint_Mission:
     def checkpoints(self):
         return self.checkpoints_val
 
+    @property
+    def planner(self) -> Planner:
+        return self.planner_val
+
+    @property
+    def obstacles(self) -> list[Coord]:
+        return self.obstacles_val
+
+    @property
+    def instrument(self) -> Instrument:
+        return self.instrument_val
+
+    @property
+    def monitor(self) -> bool:
+        return self.monitor_val
+
+    @property
+    def map(self) -> Optional[Map]:
+        return self._map
+
+    @property
+    def step_robustness(self) -> list[float]:
+        return self.step_robustness_val
+
+    @property
+    def step_conflict(self) -> list[bool]:
+        return self.step_conflict_val
+
     # TODO: initalize essential objects, like drones, maps, etc.
     def init(self) -> None:
         """initialize essential objects"""
@@ -60,6 +121,25 @@ class Checkpoint_Mission:
         self._ego_drone = Drone(id="Ego", map=self._map, init_loc=self._map.map_cell(self.ego_init_loc))
         self._chaser_drone = Drone(id="Chaser", map=self._map, init_loc=self._map.map_cell(self.chaser_init_loc))
 
+        if len(self.obstacles) > 0:
+            # written through the map, which bumps its version (the planner and rollout caches key on it)
+            obstacle_mask = np.zeros(self._map.size, dtype=np.bool_)
+            obstacle_mask[[self._map.index(self._map.map_cell(obstacle)) for obstacle in self.obstacles]] = True
+            self._map.add_layer(OBSTACLE_LAYER, dtype=np.bool_, default=False)
+            self._map.set_mask(OBSTACLE_LAYER, obstacle_mask, True)
+
+        # the checkpoints are known up front, let the planner precompute per-checkpoint data
+        self.planner_val.prepare(self._map, np.array([self._map.index(self._map.map_cell(checkpoint))
+                                                      for checkpoint in self.checkpoints], dtype=np.int64))
+
+        # rollouts are only valid for the map they were planned on
+        self.clear_rollout_cache()
+
+    def clear_rollout_cache(self) -> None:
+        """forget the memoized rollouts, the next rollout is planned from scratch"""
+        self._rollout_cache.clear()
+        self._last_rollout = None
+
     def state_planner(self, ego_curr_cell: Map_Cell, chaser_curr_cell: Map_Cell, ego_heading: Coord) -> Tuple[
         Map_Cell, Map_Cell]:
         """given the current state (location) of the ego and chaser drone, and the heading of ego drone, predict the next state (location)
@@ -70,102 +150,134 @@ class Checkpoint_Mission:
 
         the state_predictor will make sure chaser and ego remain in their current position when no advancement can be made
         """
-        ###################################################
-        # neighbor cells for ego drones and chaser drones #
-        ###################################################
+        ego_next_index, chaser_next_index = self.state_planner_indices(ego_curr_index=self._map.index(ego_curr_cell),
+                                                                       chaser_curr_index=self._map.index(chaser_curr_cell),
+                                                                       ego_heading_index=self._map.index(self._map.map_cell(ego_heading)))
 
-        ego_neighbor_cells: list[Map_Cell] = self._map.neighbor(ego_curr_cell)
-        chaser_neighbor_cells: list[Map_Cell] = self._map.neighbor(chaser_curr_cell)
+        return self._map.map_cell_at(ego_next_index), self._map.map_cell_at(chaser_next_index)
 
-        max_ego_advancement = 0  # default ego drone advancement value
-        max_ego_advancement_neighbor_cell = ego_curr_cell  # default ego advancement to ego_curr_cell
+    def state_planner_indices(self, ego_curr_index: int, chaser_curr_index: int, ego_heading_index: int) -> Tuple[
+        int, int]:
+        """index-based state_planner, operating on flattened map indices
 
-        ##########################################################################
-        # advance ego drone first make it as close to the checkpoint as possible #
-        ##########################################################################
-
-        for curr_ego_neighbor_cell in ego_neighbor_cells:
-            ego_neighbor_d2h = curr_ego_neighbor_cell.distance_to(
-                self._map.map_cell(ego_heading))  # neighbor distance to heading
-            ego_curr_d2h = ego_curr_cell.distance_to(self._map.map_cell(ego_heading))  # ego distance to heading
-            advancement = ego_curr_d2h - ego_neighbor_d2h
-
-            if advancement > max_ego_advancement:
-                max_ego_advancement = advancement
-                max_ego_advancement_neighbor_cell = curr_ego_neighbor_cell
-
-        ###############################
-        # advance chaser drone second #
-        ###############################
-
-        max_chaser_advancement = 0  # default ego drone advancement value
-        max_chaser_advancement_neighbor_cell = chaser_curr_cell  # default ego advancement to ego_curr_cell
-
-        # advance ego drone first
-        for curr_chaser_neighbor_cell in chaser_neighbor_cells:
-            chaser_neighbor_d2e = curr_chaser_neighbor_cell.distance_to(
-                ego_curr_cell)  # chaser distance to (old) ego loc
-            chaser_curr_d2e = chaser_curr_cell.distance_to(ego_curr_cell)  # chaser distance to heading
-            advancement = chaser_curr_d2e - chaser_neighbor_d2e
-
-            if advancement > max_chaser_advancement:
-                max_chaser_advancement = advancement
-                max_chaser_advancement_neighbor_cell = curr_chaser_neighbor_cell
+        the ego drone (towards its heading) and the chaser drone (towards the current, soon to be outdated, ego
+        location) are planned together by the planner backend, in one batched call
+        """
+        next_indices = self.planner_val.advance(self._map,
+                                                curr_indices=[ego_curr_index, chaser_curr_index],
+                                                target_indices=[ego_heading_index, ego_curr_index]).tolist()
 
-        return max_ego_advancement_neighbor_cell, max_chaser_advancement_neighbor_cell
+        return next_indices[0], next_indices[1]
 
     # TODO: predict, execute (loop refer to flight.py in old repo)
     def signal_predictor(self, ego_heading: Coord, pred_step: int) -> Tuple[
-        Signal, Signal]:  # return ego_drone_pred_signal, chaser_drone_pred_signal
+        Trajectory, Trajectory]:  # return ego_drone_pred_signal, chaser_drone_pred_signal
         """predict/estimate the future signal based on the current signals (represent information like heading (coord)
         in hidden class varibles self._heading
         @:param step: the number of steps the predictor need to predict
         """
-        pred_signal_ego = Signal()
-        pred_signal_chaser = Signal()
+        # the first index of the rollout is the current state of the drone, kept in the predictive signal for
+        # consistency
+        ego_indices, chaser_indices = self.rollout(ego_index=self._map.index(self._ego_drone.loc),
+                                                   chaser_index=self._map.index(self._chaser_drone.loc),
+                                                   ego_heading_index=self._map.index(self._map.map_cell(ego_heading)),
+                                                   pred_step=pred_step)
 
-        # append the current state of the drone to the first index of the predictive signal for consistency
-        pred_signal_ego.append(py_dict={"x": self._ego_drone.loc.x, "y": self._ego_drone.loc.y})
-        pred_signal_chaser.append(py_dict={"x": self._chaser_drone.loc.x, "y": self._chaser_drone.loc.y})
+        pred_signal_ego = Trajectory.from_columns(np.stack(self._map.indices_to_xy(np.array(ego_indices))))
+        pred_signal_chaser = Trajectory.from_columns(np.stack(self._map.indices_to_xy(np.array(chaser_indices))))
 
-        curr_ego_loc = self._ego_drone.loc
-        curr_chaser_loc = self._chaser_drone.loc
+        return pred_signal_ego, pred_signal_chaser
 
-        for i in range(pred_step):
-            curr_ego_loc, curr_chaser_loc = self.state_planner(ego_curr_cell=curr_ego_loc,
-                                                               chaser_curr_cell=curr_chaser_loc,
-                                                               ego_heading=ego_heading)
-            pred_signal_ego.append(py_dict={"x": curr_ego_loc.x, "y": curr_ego_loc.y})
-            pred_signal_chaser.append(py_dict={"x": curr_chaser_loc.x, "y": curr_chaser_loc.y})
+    def rollout(self, ego_index: int, chaser_index: int, ego_heading_index: int, pred_step: int) -> Tuple[
+        Tuple[int, ...], Tuple[int, ...]]:
+        """simulate pred_step planner steps from the given state, return the (ego, chaser) flattened map indices of
+        every state, including the initial one (pred_step + 1 entries each)
 
-        return pred_signal_ego, pred_signal_chaser
+        the planner is deterministic, hence rollouts are memoized (bounded LRU) by (ego index, chaser index, heading
+        index, horizon). when the state is the second state of the previous rollout (i.e. the drones executed the
+        first predicted step), the previous rollout is shifted by one and only the last state is planned
+        """
+        if self._map.version != self._rollout_version:  # the map changed (e.g. obstacles), so may the plans
+            self.clear_rollout_cache()
+            self._rollout_version = self._map.version
+
+        key = (ego_index, chaser_index, ego_heading_index, pred_step)
+
+        cached_rollout = self._rollout_cache.get(key)
+        if cached_rollout is not None:
+            self.instrument_val.count("rollout_cache_hit")
+            self._rollout_cache.move_to_end(key)
+            self._last_rollout = (key, cached_rollout)
+            return cached_rollout
+
+        ego_indices: list[int] = [ego_index]
+        chaser_indices: list[int] = [chaser_index]
+        remaining_step = pred_step
+
+        # reuse the suffix of the previous rollout, if the current state continues it
+        if self._last_rollout is not None and pred_step > 0:
+            (_, _, last_heading_index, last_pred_step), (last_ego_indices, last_chaser_indices) = self._last_rollout
+
+            if last_heading_index == ego_heading_index and last_pred_step == pred_step and \
+                    last_ego_indices[1] == ego_index and last_chaser_indices[1] == chaser_index:
+                ego_indices = list(last_ego_indices[1:])
+                chaser_indices = list(last_chaser_indices[1:])
+                remaining_step = 1
+                self.instrument_val.count("rollout_suffix_reuse")
+
+        curr_ego_index, curr_chaser_index = ego_indices[-1], chaser_indices[-1]
+        self.instrument_val.count("planner_call", remaining_step)
+        for _ in range(remaining_step):
+            curr_ego_index, curr_chaser_index = self.state_planner_indices(ego_curr_index=curr_ego_index,
+                                                                           chaser_curr_index=curr_chaser_index,
+                                                                           ego_heading_index=ego_heading_index)
+            ego_indices.append(curr_ego_index)
+            chaser_indices.append(curr_chaser_index)
+
+        new_rollout = (tuple(ego_indices), tuple(chaser_indices))
+
+        self._rollout_cache[key] = new_rollout
+        if len(self._rollout_cache) > ROLLOUT_CACHE_SIZE:
+            self._rollout_cache.popitem(last=False)  # evict the least recently used rollout
+
+        self._last_rollout = (key, new_rollout)
+        return new_rollout
 
     # TODO: start the execution loop, figure out a way to share data between drones, and use the STL_API to evaluate the properties defined.
     # TODO: Generate messages to display on the matplotlib grap
-    def execute(self, max_step=30, pred_step=4, prop: Optional[list[STL]] = None) -> Tuple[
-        list[Tuple[str, Signal, list[Signal]]], list[str]]:
-        """simulate runtime of the drone
-        @:param max_step: the maximum step allowed (in case of infinite loop)
-        @:param pred_signal: length of each predictive signal generated
-        @:param prop: properties to be check via the STL tool and the predictive signals
+    def steps(self, max_step=30, pred_step=4, prop: Optional[list[Union[STL, str]]] = None,
+              messages: bool = True) -> Iterator[Step_Record]:
+        """simulate runtime of the drone one step at a time, yield the record of every executed step
 
-        return the exe_signal and list of pred_signals for ego drone and chaser drone, respectively
-        invoke STL and predict function
+        nothing is accumulated, hence memory remains bounded however long the mission, and the caller may stop
+        iterating at any point (e.g. on the first feature conflict)
+        @:param max_step: the maximum step allowed (in case of infinite loop)
+        @:param pred_step: length of each predictive signal generated
+        @:param prop: properties to be check via the STL tool and the predictive signals (compiled STL or formula text),
+                      default to the boundary properties
+        @:param messages: build the message of every step, the records hold None otherwise
+
+        when the mission monitors (and prop is left to the default boundary properties), the properties are evaluated
+        by one Boundary_Monitor per drone: consecutive prediction windows mostly overlap, and the monitor only feeds
+        the new sample of the window of the next step under the same heading (the rollout is deterministic, and its
+        first predicted step is the one executed)
         """
-        #####################################################################################
-        # init the signal accumulators, message list record state info for initial location #
-        #####################################################################################
-        exe_signal_ego: Signal = Signal()
-        exe_signal_chaser: Signal = Signal()
+        instrument = self.instrument_val
 
-        pred_signals_ego: list[Signal] = list()
-        pred_signals_chaser: list[Signal] = list()
+        # compile the property set once per run (formula text is parsed through the process-wide cache)
+        with instrument.phase("stl_parse"):
+            if prop is None:
+                prop_list = boundary_props(map_width=self.map_width, map_height=self.map_height, pred_step=pred_step)
+            else:
+                prop_list = compile_props(prop)
 
-        # append initial location to the execution signals
-        exe_signal_ego.append(py_dict={"x": self.ego_init_loc.x, "y": self.ego_init_loc.y})
-        exe_signal_chaser.append(py_dict={"x": self.chaser_init_loc.x, "y": self.chaser_init_loc.y})
+        # online monitors of the ego and chaser drone, when the mission monitors the boundary properties
+        monitors = None
+        if self.monitor_val and prop is None:
+            monitors = [Boundary_Monitor.boundary(map_width=self.map_width, map_height=self.map_height,
+                                                  horizon=pred_step) for _ in range(2)]
 
-        messages = list()
+        step = 0
 
         ################################################
         # start the execution cycle, record state info #
@@ -178,64 +290,36 @@ class Checkpoint_Mission:
                 ###########################################
 
                 # TODO: estimate pred_step length-ed signal
-                pred_signal_ego, pred_signal_chaser = self.signal_predictor(ego_heading=curr_heading,
-                                                                            pred_step=pred_step)
-                pred_signals_ego.append(pred_signal_ego)
-                pred_signals_chaser.append(pred_signal_chaser)
+                with instrument.phase("predict"):
+                    pred_signal_ego, pred_signal_chaser = self.signal_predictor(ego_heading=curr_heading,
+                                                                                pred_step=pred_step)
 
                 ####################################################################
                 # predict feature conflicts in signals via STL-API, update message #
                 ####################################################################
                 # RESEARCH TODO: partial feature interaction for multiple features satisficement
-                # TODO: define properties in the def prop(self):, pass it into start() function
                 # TODO: modify STL-API, type check and evaluation (robustness/satisfaction) for logical operators
-                # G[0, pred_step](0 < x < map_width && 0 < y < map_height)
-                bound_prop_list = list()
-                bound_prop_list.append(
-                    STL("G[0, " + str(pred_step) + "](x < " + str(self.map_width - 3) + ")"))  # boundary property
-                bound_prop_list.append(
-                    STL("G[0, " + str(pred_step) + "](y < " + str(self.map_height - 3) + ")"))  # boundary property
-                bound_prop_list.append(STL("G[0, " + str(pred_step) + "](x > 3)"))  # boundary property
-                bound_prop_list.append(STL("G[0, " + str(pred_step) + "](y > 3)"))  # boundary property
-
-                message = "\n"
-                min_robustness_ego = 100
-                satisfy_ego = True
-
-                # ego drone satisfaction and robustness
-                for prop in bound_prop_list:
-                    prop_eval = prop.eval(0, pred_signal_ego)
-                    if not prop_eval.satisfy:
-                        satisfy_ego = False
-                    if prop_eval.robustness < min_robustness_ego:
-                        min_robustness_ego = prop_eval.robustness
-
-                if not satisfy_ego:
-                    message += "EGO CRASHING rob.     =  " + str(int(min_robustness_ego)) + "\n"
-                else:
-                    message += "                           \n"
-
-                min_robustness_chaser = 100
-                satisfy_chaser = True
-
-                # chaser drone satisfaction and robustness
-                for prop in bound_prop_list:
-                    prop_eval = prop.eval(0, pred_signal_chaser)
-                    if not prop_eval.satisfy:
-                        satisfy_chaser = False
-                    if prop_eval.robustness < min_robustness_chaser:
-                        min_robustness_chaser = prop_eval.robustness
-
-                if not satisfy_chaser:
-                    message += "CHASER CRASHING rob. =" + str(int(min_robustness_chaser))
-                else:
-                    message += "                       \n"
-
-                # if messages is not "":
-                if satisfy_ego and satisfy_chaser:
-                    message = "no conflict. rob.  =" + str(min(min_robustness_chaser, min_robustness_ego))
-
-                messages.append(message)
+
+                # evaluate every property against both predictive signals at once (converted to STL signals here)
+                with instrument.phase("stl_eval"):
+                    if monitors is not None:
+                        for monitor, pred_signal in zip(monitors, (pred_signal_ego, pred_signal_chaser)):
+                            if monitor.update_window(pred_signal.columns, step=step, plan=curr_heading):
+                                instrument.count("monitor_slide")
+
+                        satisfy_ego, satisfy_chaser = [monitor.satisfy_all for monitor in monitors]
+                        min_robustness_ego, min_robustness_chaser = [min(monitor.min_robustness, DEFAULT_ROBUSTNESS)
+                                                                     for monitor in monitors]
+                    else:
+                        prop_eval = batch_eval(prop_list, [pred_signal_ego, pred_signal_chaser])
+                        satisfy_ego, satisfy_chaser = prop_eval.satisfy_all.tolist()
+                        min_robustness_ego, min_robustness_chaser = prop_eval.min_robustness.tolist()
+
+                message = None
+                if messages:
+                    with instrument.phase("message"):
+                        message = self.step_message(satisfy_ego, satisfy_chaser, min_robustness_ego,
+                                                    min_robustness_chaser)
 
                 # TODO: python math library support for operations, syntactic sugar support || -> abs
                 # TODO: support evaluation of two signals (via parameter passing) or aggregate the signals into one with grouping (ego.x, ego.y, chaser.x, chaser.y)
@@ -246,16 +330,32 @@ class Checkpoint_Mission:
                 ##########################################
                 # execution runtime, determine next step #
                 ##########################################
-                ego_next_cell, chaser_next_cell = self.state_planner(ego_curr_cell=self._ego_drone.loc,
-                                                                     chaser_curr_cell=self._chaser_drone.loc,
-                                                                     ego_heading=curr_heading)
-
-                # set the new coordinates for the drones
-                self._ego_drone.loc = ego_next_cell
-                self._chaser_drone.loc = chaser_next_cell
-
-                exe_signal_ego.append(py_dict={"x": ego_next_cell.x, "y": ego_next_cell.y})
-                exe_signal_chaser.append(py_dict={"x": chaser_next_cell.x, "y": chaser_next_cell.y})
+                with instrument.phase("plan"):
+                    ego_next_cell, chaser_next_cell = self.state_planner(ego_curr_cell=self._ego_drone.loc,
+                                                                         chaser_curr_cell=self._chaser_drone.loc,
+                                                                         ego_heading=curr_heading)
+
+                # set the new coordinates for the drones (validated by the drones)
+                with instrument.phase("move"):
+                    self._ego_drone.loc = ego_next_cell
+                    self._chaser_drone.loc = chaser_next_cell
+
+                instrument.count("step")
+                if not (satisfy_ego and satisfy_chaser):
+                    instrument.count("conflict_step")
+
+                yield Step_Record(step=step,
+                                  heading=curr_heading,
+                                  ego_loc=ego_next_cell.coord,
+                                  chaser_loc=chaser_next_cell.coord,
+                                  pred_ego=pred_signal_ego,
+                                  pred_chaser=pred_signal_chaser,
+                                  robustness_ego=min_robustness_ego,
+                                  robustness_chaser=min_robustness_chaser,
+                                  satisfy_ego=satisfy_ego,
+                                  satisfy_chaser=satisfy_chaser,
+                                  message=message)
+                step += 1
 
                 if max_step <= 0:  # case when the execution exceed the allowed max_step
                     break
@@ -264,12 +364,78 @@ class Checkpoint_Mission:
             if max_step <= 0:
                 break
 
+    @staticmethod
+    def step_message(satisfy_ego: bool, satisfy_chaser: bool, min_robustness_ego: float,
+                     min_robustness_chaser: float) -> str:
+        """message displayed by the visualizer for a step, given the property evaluation of both drones"""
+        message = "\n"
+
+        if not satisfy_ego:
+            message += "EGO CRASHING rob.     =  " + str(int(min_robustness_ego)) + "\n"
+        else:
+            message += "                           \n"
+
+        if not satisfy_chaser:
+            message += "CHASER CRASHING rob. =" + str(int(min_robustness_chaser))
+        else:
+            message += "                       \n"
+
+        # if messages is not "":
+        if satisfy_ego and satisfy_chaser:
+            message = "no conflict. rob.  =" + str(min(min_robustness_chaser, min_robustness_ego))
+
+        return message
+
+    def execute(self, max_step=30, pred_step=4, prop: Optional[list[Union[STL, str]]] = None, verbose: bool = True) -> \
+            Tuple[list[Tuple[str, Trajectory, list[Trajectory]]], list[str]]:
+        """simulate runtime of the drone
+        @:param max_step: the maximum step allowed (in case of infinite loop)
+        @:param pred_signal: length of each predictive signal generated
+        @:param prop: properties to be check via the STL tool and the predictive signals (compiled STL or formula text),
+                      default to the boundary properties
+        @:param verbose: print the execution signals once the execution completes
+
+        return the exe_signal and list of pred_signals for ego drone and chaser drone, respectively
+        invoke STL and predict function. the step records of steps() are accumulated here
+        """
+        #####################################################################################
+        # init the signal accumulators, message list record state info for initial location #
+        #####################################################################################
+        exe_signal_ego: Trajectory = Trajectory()
+        exe_signal_chaser: Trajectory = Trajectory()
+
+        pred_signals_ego: list[Trajectory] = list()
+        pred_signals_chaser: list[Trajectory] = list()
+
+        # append initial location to the execution signals
+        exe_signal_ego.append(self.ego_init_loc.x, self.ego_init_loc.y)
+        exe_signal_chaser.append(self.chaser_init_loc.x, self.chaser_init_loc.y)
+
+        messages = list()
+        self.step_robustness_val = list()
+        self.step_conflict_val = list()
+
+        instrument = self.instrument_val
+        instrument.count("run")
+
+        for record in self.steps(max_step=max_step, pred_step=pred_step, prop=prop):
+            with instrument.phase("append"):
+                pred_signals_ego.append(record.pred_ego)
+                pred_signals_chaser.append(record.pred_chaser)
+                messages.append(record.message)
+
+                self.step_robustness_val.append(record.robustness)
+                self.step_conflict_val.append(record.conflict)
+
+                exe_signal_ego.append(record.ego_loc.x, record.ego_loc.y)
+                exe_signal_chaser.append(record.chaser_loc.x, record.chaser_loc.y)
+
         # append placeholder predictive signal to enforce consistency
-        pred_signal_ego = Signal()
-        pred_signal_ego.append(py_dict={"x": self._ego_drone.loc.x, "y": self._ego_drone.loc.y})
+        pred_signal_ego = Trajectory(capacity=1)
+        pred_signal_ego.append(self._ego_drone.loc.x, self._ego_drone.loc.y)
 
-        pred_signal_chaser = Signal()
-        pred_signal_chaser.append(py_dict={"x": self._chaser_drone.loc.x, "y": self._chaser_drone.loc.y})
+        pred_signal_chaser = Trajectory(capacity=1)
+        pred_signal_chaser.append(self._chaser_drone.loc.x, self._chaser_drone.loc.y)
 
         pred_signals_ego.append(pred_signal_ego)
         pred_signals_chaser.append(pred_signal_chaser)
@@ -280,14 +446,60 @@ class Checkpoint_Mission:
         # return aggregated list for visualization #
         ############################################
 
-        print(exe_signal_ego)
-        print(exe_signal_chaser)
+        if verbose:
+            print(exe_signal_ego)
+            print(exe_signal_chaser)
+
         return [(self._ego_drone.id, exe_signal_ego, pred_signals_ego),
                 (self._chaser_drone.id, exe_signal_chaser, pred_signals_chaser)], messages
 
+    def run(self, max_step=30, pred_step=4, prop: Optional[list[Union[STL, str]]] = None) -> Mission_Result:
+        """headless run, initialize the essential objects and execute the mission without printing or visualizing
+
+        return the structured result, call Mission_Result.render() to visualize it
+        """
+        self.init()  # init essential objects
+        signal_data, messages = self.execute(max_step=max_step, pred_step=pred_step, prop=prop, verbose=False)
+
+        return Mission_Result(signal_data=signal_data,
+                              messages=messages,
+                              step_robustness=self.step_robustness,
+                              step_conflict=self.step_conflict,
+                              complete=len(self.checkpoints) == 0 or self._ego_drone.loc.coord == self.checkpoints[-1],
+                              width=self.map_width,
+                              height=self.map_height)
+
+    def search_conflicts(self, max_step=30, pred_step=4, prop: Optional[list[Union[STL, str]]] = None,
+                         k: int = 1) -> Conflict_Result:
+        """conflict-search mode, headless run stopping at the k-th step predicting a feature conflict (a property
+        violation for either drone). messages are not built and no signal is accumulated, only the conflicting steps
+        are kept, each with both predictive signals as witness
+
+        @:param k: the number of conflicting steps to find before stopping, at least 1
+        """
+        if k < 1:
+            raise RuntimeError("unable to search for " + str(k) + " conflicting steps, expecting at least 1")
+
+        self.init()  # init essential objects
+
+        witnesses: list[Step_Record] = list()
+        steps = 0
+        min_robustness = DEFAULT_ROBUSTNESS
+
+        for record in self.steps(max_step=max_step, pred_step=pred_step, prop=prop, messages=False):
+            steps += 1
+            min_robustness = min(min_robustness, record.robustness)
+
+            if record.conflict:
+                witnesses.append(record)
+                if len(witnesses) >= k:
+                    break
+
+        return Conflict_Result(witnesses=witnesses,
+                               steps=steps,
+                               min_robustness=min_robustness,
+                               complete=len(self.checkpoints) == 0 or self._ego_drone.loc.coord == self.checkpoints[-1])
+
     def start(self):
         """start the simulation and visualize the signal data"""
-        self.init()  # init essential objects
-        signal_data, messages = self.execute()  # start simulation runtime/execution, obtain resulting signal
-        visual = Visualizer(width=self.map_width, height=self.map_height, signal_data=signal_data, messages=messages)  # init visualizer
-        visual.show()  # start visualizer
+        self.run().render()  # start simulation runtime/execution, then visualize the resulting signal
@@ -0,0 +1,148 @@
+# online robustness monitoring of the boundary properties over sliding prediction windows
+
+from collections import deque
+from typing import Hashable, Optional, Tuple
+import numpy as np
+
+
+class Sliding_Min:
+    """minimum over the last `window` values of a stream, amortized O(1) per value (monotonic deque)
+
+    Usage:
+        >>> sliding_min = Sliding_Min(window=3)
+        >>> for value in [5, 3, 4, 6, 7]:
+        ...     sliding_min.push(value)
+        >>> sliding_min.min  # min(4, 6, 7)
+        4
+    """
+    def __init__(self, window: int):
+        self.window_val = window
+        self._deque: deque[Tuple[int, float]] = deque()  # (position, value), values increasing from front to back
+        self._count = 0  # number of values pushed
+
+    @property
+    def window(self) -> int:
+        return self.window_val
+
+    @property
+    def min(self) -> Optional[float]:
+        """the minimum of the window, None before any value is pushed"""
+        return self._deque[0][1] if self._deque else None
+
+    def push(self, value: float) -> None:
+        # values no smaller than the new one can never be the minimum again
+        while self._deque and self._deque[-1][1] >= value:
+            self._deque.pop()
+
+        self._deque.append((self._count, value))
+        self._count += 1
+
+        if self._deque[0][0] <= self._count - 1 - self.window_val:  # the front left the window
+            self._deque.popleft()
+
+    def reset(self) -> None:
+        self._deque.clear()
+        self._count = 0
+
+
+class Boundary_Monitor:
+    """streaming robustness of boundary properties G[0, horizon](field < bound) and G[0, horizon](field > bound) over
+    the last horizon + 1 samples fed, with robustness bound - field and field - bound respectively
+
+    every property keeps a sliding minimum, hence each sample costs amortized O(1) per property (rather than
+    O(horizon) to evaluate the property over a fresh window)
+
+    Usage:
+        >>> monitor = Boundary_Monitor.boundary(map_width=20, map_height=20, horizon=2)
+        >>> for x, y in [(10, 10), (15, 10), (18, 10)]:
+        ...     monitor.feed(x, y)
+        >>> monitor.robustness.tolist(), monitor.satisfy_all
+        ([-1, 7, 7, 7], False)
+    """
+    def __init__(self, props: list[Tuple[str, str, float]], horizon: int, fields: Tuple[str, ...] = ("x", "y")):
+        """@:param props: the properties, as (field, "<" or ">", bound)"""
+        self.props_val = props
+        self.horizon_val = horizon
+        self.fields_val = fields
+
+        for field, operator, _ in props:
+            if field not in fields or operator not in ("<", ">"):
+                raise RuntimeError("unsupported boundary property " + field + " " + operator)
+
+        # per property: the position of its field in the samples, and the robustness sign (+1 for <, -1 for >)
+        self._field_positions = [fields.index(field) for field, _, _ in props]
+        self._signs = [1 if operator == "<" else -1 for _, operator, _ in props]
+        self._mins = [Sliding_Min(window=horizon + 1) for _ in props]
+
+        # the (step, plan, shape) of the last window given to update_window, None after a reset
+        self._last: Optional[Tuple[int, Hashable, Tuple[int, ...]]] = None
+
+    @classmethod
+    def boundary(cls, map_width: int, map_height: int, horizon: int) -> 'Boundary_Monitor':
+        """monitor of the default boundary properties (see property.boundary_props)"""
+        return cls([("x", "<", map_width - 3), ("y", "<", map_height - 3), ("x", ">", 3), ("y", ">", 3)],
+                   horizon=horizon)
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def props(self) -> list[Tuple[str, str, float]]:
+        return self.props_val
+
+    @property
+    def horizon(self) -> int:
+        return self.horizon_val
+
+    @property
+    def robustness(self) -> np.ndarray:
+        """(N,) robustness of every property over the current window"""
+        return np.array([sliding_min.min for sliding_min in self._mins])
+
+    @property
+    def satisfy(self) -> np.ndarray:
+        """(N,) whether every property is satisfied over the current window"""
+        return self.robustness > 0
+
+    @property
+    def satisfy_all(self) -> bool:
+        return all(sliding_min.min > 0 for sliding_min in self._mins)
+
+    @property
+    def min_robustness(self) -> float:
+        """min robustness over every property"""
+        return min(sliding_min.min for sliding_min in self._mins)
+
+    ###########
+    # feeding #
+    ###########
+
+    def feed(self, *values: float) -> None:
+        """feed the next sample, one value per field"""
+        for sliding_min, position, sign, (_, _, bound) in zip(self._mins, self._field_positions, self._signs,
+                                                              self.props_val):
+            sliding_min.push(sign * (bound - values[position]))
+
+    def update_window(self, window: np.ndarray, step: int, plan: Hashable = None) -> bool:
+        """move the monitor to the (fields, horizon + 1) prediction window of the given step, predicted by the given
+        plan (e.g. the heading of a deterministic planner). a window of the step following the previous one, by the
+        same plan, continues the previous window (shifted by one sample, the first predicted sample being executed):
+        only its last sample is fed, in O(1) whatever the horizon. otherwise the monitor is refilled from the whole
+        window. return whether the window slid"""
+        slid = self._last == (step - 1, plan, window.shape)
+
+        if slid:
+            self.feed(*window[:, -1].tolist())
+        else:
+            self.reset()
+            for sample in window.T.tolist():
+                self.feed(*sample)
+
+        self._last = (step, plan, window.shape)
+        return slid
+
+    def reset(self) -> None:
+        for sliding_min in self._mins:
+            sliding_min.reset()
+        self._last = None
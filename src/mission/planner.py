@@ -0,0 +1,580 @@
+# planners shared by the missions, operating on flattened map indices
+
+from src.obj.map import Map
+from src.obj.map_util.map import NEIGHBOR_DIRECTIONS
+from typing import Optional, Tuple
+from collections import OrderedDict
+import abc
+import heapq
+import math
+import weakref
+import numpy as np
+
+OBSTACLE_LAYER = "obstacle"  # boolean map layer, cells holding True cannot be entered
+PATH_CACHE_SIZE = 65536  # maximum number of (cell, goal) entries kept by a path planner (LRU eviction)
+FIELD_CACHE_BYTES = 64 * 2 ** 20  # maximum memory held by the distance fields of a field planner (LRU eviction)
+SQRT2 = math.sqrt(2)  # cost of a diagonal move
+EPSILON = 1e-9  # tolerance when comparing path costs
+UNREACHABLE = np.iinfo(np.int64).max  # squared distance of the neighbors that cannot be entered
+
+# map -> (map version, obstacle mask), the mask of every map computed once per version
+_obstacle_masks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def greedy_advance(map: Map, curr_indices: np.ndarray, target_indices: np.ndarray) -> np.ndarray:
+    """batched greedy planner. for every mover, find the neighbor that maximally advances towards its target
+
+    all candidate moves of all movers are scored in one array operation, using squared euclidean distances (same
+    ordering as the euclidean distances, without the sqrt). ties are broken by the neighbor order of the map (the
+    first maximal neighbor wins), and a mover remains in its current cell when no advancement can be made
+
+    @:param map: the map the movers are located on
+    @:param curr_indices: flattened map indices of the current cells, shape (M,)
+    @:param target_indices: flattened map indices of the cells each mover heads to, shape (M,)
+    @:return flattened map indices of the next cells, shape (M,)
+    """
+    curr_indices = np.asarray(curr_indices, dtype=np.int64)
+    candidates, candidate_d2, curr_d2 = _greedy_scores(map, curr_indices, np.asarray(target_indices, dtype=np.int64))
+
+    return _descend(curr_indices, candidates, candidate_d2, curr_d2)
+
+
+def _greedy_scores(map: Map, curr_indices: np.ndarray, target_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray,
+                                                                                             np.ndarray]:
+    """score the candidate moves of every mover by their squared euclidean distance to its target
+
+    @:return the (M, 8) candidate cells (-1 for the out-of-bound and blocked neighbors), their (M, 8) squared
+             distances (UNREACHABLE for -1 candidates), and the (M,) squared distances of the current cells
+    """
+    candidates = map.neighbor_table()[curr_indices]  # (M, 8), -1 for out-of-bound neighbors
+
+    blocked = obstacle_mask(map)
+    if blocked is not None:  # obstacles are never entered, like out-of-bound neighbors
+        candidates = np.where((candidates >= 0) & ~blocked[candidates], candidates, -1)
+
+    candidate_x, candidate_y = map.indices_to_xy(candidates)
+    target_x, target_y = map.indices_to_xy(target_indices)
+    curr_x, curr_y = map.indices_to_xy(curr_indices)
+
+    candidate_d2 = (candidate_x - target_x[:, None]) ** 2 + (candidate_y - target_y[:, None]) ** 2
+    candidate_d2 = np.where(candidates >= 0, candidate_d2, UNREACHABLE)
+    curr_d2 = (curr_x - target_x) ** 2 + (curr_y - target_y) ** 2
+
+    return candidates, candidate_d2, curr_d2
+
+
+def _descend(curr_indices: np.ndarray, candidates: np.ndarray, distances: np.ndarray,
+             curr_distances: np.ndarray) -> np.ndarray:
+    """move every mover to its closest candidate, when closer than its current cell (in place otherwise)"""
+    rows = np.arange(len(curr_indices))
+    best = distances.argmin(axis=1)  # argmin returns the first minimum, preserving the neighbor order tie-break
+
+    return np.where(distances[rows, best] < curr_distances, candidates[rows, best], curr_indices)
+
+
+def obstacle_mask(map: Map) -> Optional[np.ndarray]:
+    """(size,) boolean mask of the cells blocked by the obstacle layer, None if the map has no obstacle layer
+
+    the mask is computed once per map version and shared by every caller (it is read-only). obstacles must hence be
+    written through the map (e.g. Map.set_mask), which bumps its version
+    """
+    cached = _obstacle_masks.get(map)
+    if cached is not None and cached[0] == map.version:
+        return cached[1]
+
+    mask = None
+    if map.has_layer(OBSTACLE_LAYER):
+        mask = map.layer(OBSTACLE_LAYER).to_dense().astype(np.bool_)  # a copy, even for a dense boolean layer
+        mask.flags.writeable = False
+
+    _obstacle_masks[map] = (map.version, mask)
+    return mask
+
+
+def blocked_cells(map: Map) -> frozenset[int]:
+    """flattened map indices of the cells blocked by the obstacle layer, for per-cell lookups (searches)"""
+    mask = obstacle_mask(map)
+    return frozenset(np.flatnonzero(mask).tolist()) if mask is not None else frozenset()
+
+
+class Planner(metaclass=abc.ABCMeta):
+    """interface of the planner backends of the missions. a planner determines the next cell of every mover"""
+
+    @abc.abstractmethod
+    def advance(self, map: Map, curr_indices: np.ndarray, target_indices: np.ndarray) -> np.ndarray:
+        """plan one step for every mover
+
+        @:param map: the map the movers are located on
+        @:param curr_indices: flattened map indices of the current cells, shape (M,)
+        @:param target_indices: flattened map indices of the cells each mover heads to, shape (M,)
+        @:return flattened map indices of the next cells, shape (M,)
+        """
+        pass
+
+    def prepare(self, map: Map, goals: np.ndarray) -> None:
+        """hook called once the map of a mission is set up, with the flattened map indices of the goals known up front
+        (e.g. the checkpoints). planners may precompute per-goal data, the default does nothing"""
+        pass
+
+
+class Greedy_Planner(Planner):
+    """step to the neighbor that maximally advances towards the target (see greedy_advance), the default planner"""
+
+    def advance(self, map: Map, curr_indices: np.ndarray, target_indices: np.ndarray) -> np.ndarray:
+        return greedy_advance(map, curr_indices, target_indices)
+
+
+class Field_Planner(Planner):
+    """plan towards the prepared goals by descending a precomputed distance field of the goal: a map-sized array of
+    the distance from every cell to the goal, so that every planning step is an argmin over the 8 neighbor entries.
+    movers heading to any other target (e.g. a chaser heading to a moving drone) are planned greedily, scoring their 8
+    neighbors on the fly, exactly as greedy_advance. movers are planned in batches: one greedy_advance call for the
+    movers without a field, and one field gather per distinct goal for the others
+
+    @:param kind: "euclidean", the squared euclidean distance (the fields reproduce greedy_advance exactly), or
+                  "cost_to_go", the length of the shortest 8-connected path around the obstacles (computed with
+                  Dijkstra, diagonal moves cost sqrt(2) and may not cut the corner of an obstacle, as AStar_Planner),
+                  which never stalls behind an obstacle
+
+    fields are computed lazily on first use, and kept within a memory budget (LRU eviction). they are dropped
+    whenever the map version changes (e.g. obstacles are added). the goals are those of the last prepare call, hence
+    of the current mission
+
+    Usage:
+        >>> from src.obj.map import Coord, Map
+        >>> map = Map(20, 20)
+        >>> planner = Field_Planner()
+        >>> planner.prepare(map, np.array([map.index(Coord(10, 19))]))
+        >>> map.coord(int(planner.advance(map, [map.index(Coord(1, 10))], [map.index(Coord(10, 19))])[0]))
+        Coord(2, 11)
+    """
+    def __init__(self, kind: str = "euclidean", cache_bytes: int = FIELD_CACHE_BYTES):
+        if kind not in ("euclidean", "cost_to_go"):
+            raise RuntimeError("unknown distance field \"" + kind + "\"")
+
+        self.kind_val = kind
+        self.cache_bytes_val = cache_bytes
+
+        self._goals: np.ndarray = np.zeros(0, dtype=np.int64)  # goals planned with a distance field
+        self._fields: OrderedDict[int, np.ndarray] = OrderedDict()  # goal -> distance field, shape (size + 1,)
+        self._field_bytes = 0
+        self._map: Optional[Map] = None
+        self._version = -1  # map version the fields (and the blocked cells) were computed for
+        self._blocked: Optional[np.ndarray] = None  # obstacle mask of the map, None without obstacles
+
+        self.computed_val = 0  # number of fields computed, i.e. field cache misses
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def kind(self) -> str:
+        return self.kind_val
+
+    @property
+    def computed(self) -> int:
+        return self.computed_val
+
+    ############
+    # planning #
+    ############
+
+    def prepare(self, map: Map, goals: np.ndarray) -> None:
+        """plan towards the goals (e.g. the checkpoints of a mission) with distance fields, replacing the goals (and
+        dropping the fields) of any previous preparation"""
+        self._check_version(map)
+        self._clear_fields()
+        self._goals = np.unique(np.asarray(goals, dtype=np.int64))
+
+    def advance(self, map: Map, curr_indices: np.ndarray, target_indices: np.ndarray) -> np.ndarray:
+        self._check_version(map)
+        curr_indices = np.asarray(curr_indices, dtype=np.int64)
+        target_indices = np.asarray(target_indices, dtype=np.int64)
+
+        field_movers = (target_indices[:, None] == self._goals).any(axis=1)
+        if not field_movers.any():
+            return greedy_advance(map, curr_indices, target_indices)
+
+        next_indices = np.empty_like(curr_indices)
+        greedy_movers = np.flatnonzero(~field_movers)
+        if len(greedy_movers) > 0:
+            next_indices[greedy_movers] = greedy_advance(map, curr_indices[greedy_movers],
+                                                         target_indices[greedy_movers])
+
+        # out-of-bound (-1) candidates look up the sentinel entry appended after the last cell, obstacles are at the
+        # maximal distance of the field
+        field_movers = np.flatnonzero(field_movers)
+        field_curr, field_targets = curr_indices[field_movers], target_indices[field_movers]
+        candidates = map.neighbor_table()[field_curr]  # gathered once for every field mover
+        if self.kind_val == "cost_to_go" and self._blocked is not None:
+            candidates = self._uncut(map, field_curr, candidates)
+
+        for goal in set(field_targets.tolist()):
+            movers = np.flatnonzero(field_targets == goal)
+            field = self.field(map, goal)
+            next_indices[field_movers[movers]] = _descend(field_curr[movers], candidates[movers],
+                                                          field[candidates[movers]], field[field_curr[movers]])
+
+        return next_indices
+
+    def _uncut(self, map: Map, curr_indices: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """the candidates of the movers, where the diagonal moves cutting the corner of an obstacle are -1"""
+        candidates = candidates.copy()
+
+        for column, (_, dx, dy) in enumerate(NEIGHBOR_DIRECTIONS):
+            if dx != 0 and dy != 0:
+                rows = np.flatnonzero(candidates[:, column] >= 0)
+                # the two orthogonal cells of the corner are in bound, as the diagonal one is
+                cut = self._blocked[curr_indices[rows] + dx] | self._blocked[curr_indices[rows] + dy * map.width]
+                candidates[rows[cut], column] = -1
+
+        return candidates
+
+    def _check_version(self, map: Map) -> None:
+        """drop the fields computed for another map (and its goals), or an outdated version of the map"""
+        if map is not self._map:
+            self._goals = np.zeros(0, dtype=np.int64)
+
+        if map is not self._map or map.version != self._version:
+            self._clear_fields()
+            self._map, self._version = map, map.version
+            self._blocked = obstacle_mask(map)
+
+    def _clear_fields(self) -> None:
+        self._fields.clear()
+        self._field_bytes = 0
+
+    def field(self, map: Map, goal: int) -> np.ndarray:
+        """distance field of the goal, shape (size + 1,): the distance of every cell, then a sentinel entry (the maximal
+        distance), so that the -1 entries of the neighbor table look it up"""
+        self._check_version(map)
+
+        field = self._fields.get(goal)
+        if field is not None:
+            self._fields.move_to_end(goal)
+            return field
+
+        self.computed_val += 1
+        field = self._euclidean_field(map, goal) if self.kind_val == "euclidean" else self._cost_to_go_field(map, goal)
+
+        self._fields[goal] = field
+        self._field_bytes += field.nbytes
+        while self._field_bytes > self.cache_bytes_val and len(self._fields) > 1:
+            _, evicted = self._fields.popitem(last=False)  # evict the least recently used field
+            self._field_bytes -= evicted.nbytes
+
+        return field
+
+    def _euclidean_field(self, map: Map, goal: int) -> np.ndarray:
+        """squared euclidean distance of every cell to the goal, obstacles are at the maximal distance. int32 unless
+        the squared diagonal of the map does not fit"""
+        dtype = np.int32 if (map.width - 1) ** 2 + (map.height - 1) ** 2 < np.iinfo(np.int32).max else np.int64
+        goal_y, goal_x = divmod(goal, map.width)
+
+        # the sum of the squared row and column offsets, broadcast without any map-sized temporary
+        field = np.full(map.size + 1, np.iinfo(dtype).max, dtype=dtype)
+        np.add((np.arange(map.height, dtype=dtype) - goal_y)[:, None] ** 2,
+               (np.arange(map.width, dtype=dtype) - goal_x)[None, :] ** 2,
+               out=field[:-1].reshape(map.height, map.width))
+
+        if self._blocked is not None:
+            field[:-1][self._blocked] = np.iinfo(dtype).max
+
+        return field
+
+    def _cost_to_go_field(self, map: Map, goal: int) -> np.ndarray:
+        """length of the shortest path from every cell to the goal (Dijkstra from the goal), inf when unreachable.
+        diagonal moves may not cut the corner of an obstacle (the rule is symmetric, the path back from the goal
+        passes the same corners)"""
+        width, height, blocked = map.width_val, map.height_val, blocked_cells(map)
+        # neighbors are computed from the cell index (as AStar_Planner._successors), no neighbor table is materialized
+        moves = [(dx, dy, dy * width + dx, SQRT2 if dx != 0 and dy != 0 else 1) for _, dx, dy in NEIGHBOR_DIRECTIONS]
+
+        cost = [math.inf] * map.size  # the field covers every cell
+        if goal not in blocked:
+            cost[goal] = 0.0
+
+        open_heap = [(0.0, goal)] if goal not in blocked else list()
+        while open_heap:
+            index_cost, index = heapq.heappop(open_heap)
+            if index_cost > cost[index]:  # stale heap entry
+                continue
+
+            y, x = divmod(index, width)
+            for dx, dy, offset, step_cost in moves:
+                neighbor = index + offset
+                if not (0 <= x + dx < width and 0 <= y + dy < height) or neighbor in blocked:
+                    continue
+
+                # the two orthogonal cells of the corner are in bound, as the diagonal one is
+                if dx != 0 and dy != 0 and (index + dx in blocked or index + dy * width in blocked):
+                    continue
+
+                neighbor_cost = index_cost + step_cost
+                if neighbor_cost < cost[neighbor] - EPSILON:
+                    cost[neighbor] = neighbor_cost
+                    heapq.heappush(open_heap, (neighbor_cost, neighbor))
+
+        field = np.empty(map.size + 1, dtype=np.float64)
+        field[:-1] = cost
+        field[-1] = math.inf
+        return field
+
+
+class AStar_Planner(Planner):
+    """follow the shortest 8-connected path to the target, avoiding the cells of the obstacle layer. diagonal moves
+    cost sqrt(2) and may not cut the corner of an obstacle
+
+    paths are searched with A* (binary heap open list, octile distance heuristic) and cached:
+    every cell of a found path maps to its remaining path to the same goal, hence a checkpoint leg is only planned
+    once. the cache is dropped whenever the map version changes (e.g. obstacles are added). a mover remains in its
+    current cell when its target is unreachable
+
+    Usage:
+        >>> from src.obj.map import Coord, Map
+        >>> map = Map(5, 5)
+        >>> map.add_layer(OBSTACLE_LAYER, dtype=np.bool_, default=False) is not None
+        True
+        >>> map.set_region(OBSTACLE_LAYER, 2, 0, 3, 4, True)  # wall at x = 2, open at y = 4
+        >>> planner = AStar_Planner()
+        >>> path = [map.coord(index) for index in planner.path(map, map.index(Coord(0, 0)), map.index(Coord(4, 0)))]
+        >>> path[:6]
+        [Coord(0, 0), Coord(1, 1), Coord(1, 2), Coord(1, 3), Coord(1, 4), Coord(2, 4)]
+        >>> path[6:]
+        [Coord(3, 4), Coord(3, 3), Coord(4, 2), Coord(4, 1), Coord(4, 0)]
+    """
+    def __init__(self, cache_size: int = PATH_CACHE_SIZE):
+        self.cache_size_val = cache_size
+
+        # (cell, goal) -> (path, position of the cell in the path), for every cell of every cached path
+        self._paths: OrderedDict[Tuple[int, int], Tuple[Tuple[int, ...], int]] = OrderedDict()
+        self._map: Optional[Map] = None
+        self._version = -1  # map version the cache (and the blocked cells) were computed for
+        self._blocked: frozenset[int] = frozenset()  # cells blocked by an obstacle
+
+        self.searches_val = 0  # number of path searches, i.e. path cache misses
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def cache_size(self) -> int:
+        return self.cache_size_val
+
+    @property
+    def searches(self) -> int:
+        return self.searches_val
+
+    ############
+    # planning #
+    ############
+
+    def advance(self, map: Map, curr_indices: np.ndarray, target_indices: np.ndarray) -> np.ndarray:
+        return np.array([self.next_index(map, curr_index, target_index)
+                         for curr_index, target_index in zip(np.asarray(curr_indices).tolist(),
+                                                             np.asarray(target_indices).tolist())], dtype=np.int64)
+
+    def next_index(self, map: Map, curr_index: int, target_index: int) -> int:
+        """next cell on the shortest path from the current cell to the target"""
+        path, position = self._cached_path(map, curr_index, target_index)
+        return path[position + 1] if position + 1 < len(path) else curr_index
+
+    def path(self, map: Map, start: int, goal: int) -> Tuple[int, ...]:
+        """shortest path from start to goal (both included), (start,) when the goal is unreachable"""
+        path, position = self._cached_path(map, start, goal)
+        return path[position:]
+
+    def _cached_path(self, map: Map, start: int, goal: int) -> Tuple[Tuple[int, ...], int]:
+        if map is not self._map or map.version != self._version:
+            self._paths.clear()
+            self._map, self._version = map, map.version
+            self._blocked = blocked_cells(map)
+
+        key = (start, goal)
+        cached = self._paths.get(key)
+        if cached is not None:
+            self._paths.move_to_end(key)
+            return cached
+
+        self.searches_val += 1
+        path = self._search(map, start, goal)
+
+        for position, index in enumerate(path):
+            self._paths[(index, goal)] = (path, position)
+            self._paths.move_to_end((index, goal))
+
+        while len(self._paths) > self.cache_size_val:
+            self._paths.popitem(last=False)  # evict the least recently used path entries
+
+        return self._paths[key]
+
+    def _walkable(self, map: Map, x: int, y: int) -> bool:
+        return 0 <= x < map.width and 0 <= y < map.height and map.width * y + x not in self._blocked
+
+    def _heuristic(self, map: Map, index: int, goal: int) -> float:
+        """octile distance, the exact cost of the shortest path on an obstacle-free map"""
+        width = map.width_val
+        dx = abs(index % width - goal % width)
+        dy = abs(index // width - goal // width)
+        return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+    def _successors(self, map: Map, index: int, parent: int) -> list[Tuple[int, float]]:
+        """(successor, cost) of the cell, i.e. every walkable neighbor reachable without cutting an obstacle corner"""
+        width, height, blocked = map.width_val, map.height_val, self._blocked
+        y, x = divmod(index, width)
+        successors = list()
+
+        for _, dx, dy in NEIGHBOR_DIRECTIONS:
+            successor = index + dy * width + dx
+            if not (0 <= x + dx < width and 0 <= y + dy < height) or successor in blocked:
+                continue
+
+            if dx != 0 and dy != 0:
+                # the two orthogonal cells of the corner are in bound, as the diagonal one is
+                if index + dx in blocked or index + dy * width in blocked:
+                    continue
+                successors.append((successor, SQRT2))
+            else:
+                successors.append((successor, 1))
+
+        return successors
+
+    def _search(self, map: Map, start: int, goal: int) -> Tuple[int, ...]:
+        """A* search from start to goal, return the path found, (start,) when the goal is unreachable
+
+        g-scores and parents are kept in dictionaries holding the cells reached only, hence the cost of a search
+        depends on the cells expanded rather than on the size of the map
+        """
+        if start in self._blocked or goal in self._blocked:
+            return (start,)
+
+        g_score: dict[int, float] = {start: 0.0}
+        parent: dict[int, int] = {start: -1}
+
+        open_heap = [(self._heuristic(map, start, goal), 0.0, start)]
+        while open_heap:
+            _, g, index = heapq.heappop(open_heap)
+            if index == goal:
+                break
+            if g > g_score[index]:  # stale heap entry, the cell was reached by a shorter path since
+                continue
+
+            for successor, cost in self._successors(map, index, parent[index]):
+                successor_g = g + cost
+                if successor_g < g_score.get(successor, math.inf) - EPSILON:
+                    g_score[successor] = successor_g
+                    parent[successor] = index
+                    heapq.heappush(open_heap, (successor_g + self._heuristic(map, successor, goal), successor_g,
+                                               successor))
+
+        if goal not in parent:
+            return (start,)
+
+        return self._unwind(map, parent, goal)
+
+    def _unwind(self, map: Map, parent: dict[int, int], goal: int) -> Tuple[int, ...]:
+        """follow the parents from goal back to start, return the path from start to goal"""
+        path = [goal]
+        while parent[path[-1]] != -1:
+            path.append(parent[path[-1]])
+
+        return tuple(reversed(path))
+
+
+class JPS_Planner(AStar_Planner):
+    """A* with jump point search: on uniform-cost grids, runs of cells without obstacles around them are skipped
+    ("jumped") rather than pushed onto the open list, only the jump points are expanded. yields paths of the same cost
+    as AStar_Planner (the path itself may differ among equal-cost paths)
+    """
+
+    def __init__(self, cache_size: int = PATH_CACHE_SIZE):
+        super().__init__(cache_size=cache_size)
+        self._goal = -1  # goal of the current search, every jump stops on it
+
+    def _successors(self, map: Map, index: int, parent: int) -> list[Tuple[int, float]]:
+        x, y = index % map.width, index // map.width
+
+        successors = list()
+        for dx, dy in self._directions(map, x, y, parent):
+            jump_point = self._jump(map, x + dx, y + dy, dx, dy)
+            if jump_point is not None:
+                jump_x, jump_y = jump_point
+                distance_x, distance_y = abs(jump_x - x), abs(jump_y - y)
+                successors.append((map.width * jump_y + jump_x,
+                                   max(distance_x, distance_y) + (SQRT2 - 1) * min(distance_x, distance_y)))
+
+        return successors
+
+    def _directions(self, map: Map, x: int, y: int, parent: int) -> list[Tuple[int, int]]:
+        """pruned search directions of the cell, given the direction it was entered from"""
+        if parent == -1:
+            return [(dx, dy) for _, dx, dy in NEIGHBOR_DIRECTIONS]
+
+        dx = int(np.sign(x - parent % map.width))
+        dy = int(np.sign(y - parent // map.width))
+        walkable = self._walkable
+
+        directions = list()
+        if dx != 0 and dy != 0:
+            directions.extend([(dx, 0), (0, dy), (dx, dy)])
+        elif dx != 0:
+            directions.append((dx, 0))
+            for side in (-1, 1):  # forced neighbors, unreachable from the parent without passing through the cell
+                if walkable(map, x, y + side) and not walkable(map, x - dx, y + side):
+                    directions.extend([(0, side), (dx, side)])
+        else:
+            directions.append((0, dy))
+            for side in (-1, 1):
+                if walkable(map, x + side, y) and not walkable(map, x + side, y - dy):
+                    directions.extend([(side, 0), (side, dy)])
+
+        return directions
+
+    def _jump(self, map: Map, x: int, y: int, dx: int, dy: int) -> Optional[Tuple[int, int]]:
+        """step from (x - dx, y - dy) in the direction (dx, dy) until a jump point is found, None on a dead end"""
+        walkable = self._walkable
+        goal_x, goal_y = self._goal % map.width, self._goal // map.width
+
+        while True:
+            # diagonal steps may not cut an obstacle corner
+            if not walkable(map, x, y) or \
+                    (dx != 0 and dy != 0 and not (walkable(map, x - dx, y) and walkable(map, x, y - dy))):
+                return None
+
+            if x == goal_x and y == goal_y:
+                return x, y
+
+            if dx != 0 and dy != 0:
+                # a diagonal step is a jump point when a straight jump from it finds one
+                if self._jump(map, x + dx, y, dx, 0) is not None or self._jump(map, x, y + dy, 0, dy) is not None:
+                    return x, y
+            elif dx != 0:
+                if any(walkable(map, x, y + side) and not walkable(map, x - dx, y + side) for side in (-1, 1)):
+                    return x, y
+            else:
+                if any(walkable(map, x + side, y) and not walkable(map, x + side, y - dy) for side in (-1, 1)):
+                    return x, y
+
+            x, y = x + dx, y + dy
+
+    def _search(self, map: Map, start: int, goal: int) -> Tuple[int, ...]:
+        self._goal = goal
+        return super()._search(map, start, goal)
+
+    def _unwind(self, map: Map, parent: dict[int, int], goal: int) -> Tuple[int, ...]:
+        """follow the jump points back to start, filling in the cells jumped over in between"""
+        jump_points = super()._unwind(map, parent, goal)
+        path = [jump_points[0]]
+
+        for jump_point in jump_points[1:]:
+            x, y = path[-1] % map.width, path[-1] // map.width
+            dx = int(np.sign(jump_point % map.width - x))
+            dy = int(np.sign(jump_point // map.width - y))
+
+            while path[-1] != jump_point:
+                x, y = x + dx, y + dy
+                path.append(map.width * y + x)
+
+        return tuple(path)
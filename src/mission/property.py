@@ -0,0 +1,161 @@
+# properties evaluated by the missions via the STL-API
+
+from src.obj.trajectory import Trajectory
+from stl.api import Signal, STL
+from functools import lru_cache
+from typing import NamedTuple, Optional, Union
+import re
+import numpy as np
+
+STL_CACHE_SIZE = 1024  # maximum number of compiled formulas kept in the process-wide cache
+DEFAULT_ROBUSTNESS = 100  # robustness reported for a signal when no property lowers it
+
+# G[begin, end](field < bound) or G[begin, end](field > bound), the form of the boundary properties
+BOUND_PATTERN = re.compile(r"\s*G\s*\[\s*(\d+)\s*,\s*(\d+)\s*\]"
+                           r"\s*\(\s*([A-Za-z_]\w*)\s*([<>])\s*(-?\d+(?:\.\d+)?)\s*\)\s*")
+
+
+class Bound(NamedTuple):
+    """an always-bounded field, G[begin, end](field < bound) or G[begin, end](field > bound)"""
+    begin: int
+    end: int
+    field: str
+    operator: str
+    bound: Union[int, float]
+
+
+def parse_bound(formula: str) -> Optional[Bound]:
+    """the bound form of the formula, None if the formula is not an always-bounded field
+
+    Usage:
+        >>> parse_bound("G[0, 4](x < 17)")
+        Bound(begin=0, end=4, field='x', operator='<', bound=17)
+        >>> parse_bound("F[0, 4](x < 17)") is None
+        True
+    """
+    match = BOUND_PATTERN.fullmatch(formula)
+    if match is None:
+        return None
+
+    begin, end, field, operator, bound = match.groups()
+    return Bound(int(begin), int(end), field, operator, float(bound) if "." in bound else int(bound))
+
+
+class Compiled_STL(STL):
+    """STL formula compiled by the missions, remembering its bound form (if any), which batch_eval evaluates over
+    every signal at once rather than one STL-API evaluation per signal"""
+    def __init__(self, formula: str):
+        super().__init__(formula)
+        self.bound_val = parse_bound(formula)
+
+    @property
+    def bound(self) -> Optional[Bound]:
+        return self.bound_val
+
+
+@lru_cache(maxsize=STL_CACHE_SIZE)
+def compile_prop(formula: str) -> Compiled_STL:
+    """lex and parse the STL formula once, identical formula text is served from a process-wide cache afterwards"""
+    return Compiled_STL(formula)
+
+
+def compile_props(props: list[Union[STL, str]]) -> list[STL]:
+    """compile a caller-supplied property list, where each property is either a compiled STL or its formula text"""
+    return [compile_prop(prop) if isinstance(prop, str) else prop for prop in props]
+
+
+def boundary_props(map_width: int, map_height: int, pred_step: int) -> list[STL]:
+    """the default boundary properties, requiring the drone to remain 3 cells away from the map boundaries within the
+    prediction horizon. G[0, pred_step](3 < x < map_width - 3 && 3 < y < map_height - 3)
+    """
+    return compile_props([
+        "G[0, " + str(pred_step) + "](x < " + str(map_width - 3) + ")",
+        "G[0, " + str(pred_step) + "](y < " + str(map_height - 3) + ")",
+        "G[0, " + str(pred_step) + "](x > 3)",
+        "G[0, " + str(pred_step) + "](y > 3)"
+    ])
+
+
+class Batch_Eval:
+    """satisfaction and robustness of N properties evaluated over M signals
+
+    Attributes:
+        self.satisfy_val: (N, M) boolean matrix, whether property i is satisfied by signal j
+        self.robustness_val: (N, M) robustness matrix of property i over signal j
+        self.default_robustness_val: the initial value of the min-robustness fold
+    """
+    def __init__(self, satisfy: np.ndarray, robustness: np.ndarray, default_robustness=DEFAULT_ROBUSTNESS):
+        self.satisfy_val = satisfy
+        self.robustness_val = robustness
+        self.default_robustness_val = default_robustness
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def satisfy(self) -> np.ndarray:
+        return self.satisfy_val
+
+    @property
+    def robustness(self) -> np.ndarray:
+        return self.robustness_val
+
+    @property
+    def satisfy_all(self) -> np.ndarray:
+        """(M,) whether each signal satisfies every property"""
+        return self.satisfy_val.all(axis=0)
+
+    @property
+    def min_robustness(self) -> np.ndarray:
+        """(M,) the minimum robustness of each signal over every property (folded from the default robustness)"""
+        return self.robustness_val.min(axis=0, initial=self.default_robustness_val)
+
+
+def batch_eval(props: list[STL], signals: list[Union[Signal, Trajectory]], time: int = 0,
+               default_robustness=DEFAULT_ROBUSTNESS) -> Batch_Eval:
+    """evaluate N properties over M signals in one call
+
+    properties compiled in their bound form (see Compiled_STL) are evaluated over the M signals at once: the robustness
+    of G[begin, end](field < bound) is min(bound - field) over the window (and min(field - bound) for >), satisfied
+    when positive. other properties, and windows running past the end of a signal, are evaluated by the STL-API
+
+    @:param props: compiled properties (see compile_props)
+    @:param signals: signals to evaluate the properties against, trajectories are converted to signals when needed
+    @:param time: the time (signal index) at which the properties are evaluated
+    @:param default_robustness: the initial value of the min-robustness fold
+    @:return the (N, M) satisfaction and robustness matrices, with the per-signal fold built in
+    """
+    stl_signals: Optional[list[Signal]] = None
+    columns: dict[str, list[np.ndarray]] = dict()  # field -> the column of every signal
+    length = min((len(signal) for signal in signals), default=0)
+
+    satisfy_rows, robustness_rows = list(), list()
+    for curr_prop in props:
+        bound = getattr(curr_prop, "bound", None)
+
+        if bound is not None and len(signals) > 0 and time + bound.end < length:
+            field_columns = columns.get(bound.field)
+            if field_columns is None:
+                field_columns = columns[bound.field] = [signal.column(bound.field) if isinstance(signal, Trajectory)
+                                                        else np.array(signal.lookup(bound.field)) for signal in signals]
+
+            window = np.stack([column[time + bound.begin:time + bound.end + 1] for column in field_columns])
+            margin = bound.bound - window if bound.operator == "<" else window - bound.bound
+            robustness = margin.min(axis=1).tolist()
+            satisfy = [value > 0 for value in robustness]
+        else:
+            if stl_signals is None:
+                stl_signals = [signal.to_signal() if isinstance(signal, Trajectory) else signal for signal in signals]
+
+            evals = [curr_prop.eval(time, signal) for signal in stl_signals]
+            satisfy = [prop_eval.satisfy for prop_eval in evals]
+            robustness = [prop_eval.robustness for prop_eval in evals]
+
+        satisfy_rows.append(satisfy)
+        robustness_rows.append(robustness)
+
+    # let numpy infer the robustness type, integer robustness values remain integers
+    return Batch_Eval(satisfy=np.array(satisfy_rows, dtype=np.bool_).reshape(len(props), len(signals)),
+                      robustness=np.array(robustness_rows).reshape(len(props), len(signals)),
+                      default_robustness=default_robustness)
@@ -0,0 +1,166 @@
+# structured result of a mission execution, rendering is an explicit opt-in
+
+from src.obj.map import Coord
+from src.obj.trajectory import Trajectory
+from src.mission.property import DEFAULT_ROBUSTNESS
+from typing import NamedTuple, Optional, Tuple
+
+
+class Step_Record(NamedTuple):
+    """one execution step of a mission, as streamed by Checkpoint_Mission.steps
+
+    Attributes:
+        step: number of the step, from 0
+        heading: the checkpoint the ego drone headed to
+        ego_loc, chaser_loc: the locations of the drones once the step is executed
+        pred_ego, pred_chaser: the predictive signals evaluated before the step
+        robustness_ego, robustness_chaser: min robustness of the properties over the predictive signal of each drone
+        satisfy_ego, satisfy_chaser: whether each drone satisfies every property
+        message: the message displayed by the visualizer for the step, None when messages are not built
+    """
+    step: int
+    heading: Coord
+    ego_loc: Coord
+    chaser_loc: Coord
+    pred_ego: Trajectory
+    pred_chaser: Trajectory
+    robustness_ego: float
+    robustness_chaser: float
+    satisfy_ego: bool
+    satisfy_chaser: bool
+    message: Optional[str]
+
+    @property
+    def robustness(self) -> float:
+        """min robustness over both drones"""
+        return min(self.robustness_chaser, self.robustness_ego)
+
+    @property
+    def conflict(self) -> bool:
+        """whether a feature conflict (property violation for either drone) is predicted"""
+        return not (self.satisfy_ego and self.satisfy_chaser)
+
+
+class Conflict_Result(NamedTuple):
+    """outcome of a conflict search (Checkpoint_Mission.search_conflicts)
+
+    Attributes:
+        witnesses: the conflicting steps found (at most k), each with both predictive signals
+        steps: number of executed steps, up to and including the last witness
+        min_robustness: min robustness over every executed step and both drones
+        complete: whether the ego drone reached its last checkpoint
+    """
+    witnesses: list[Step_Record]
+    steps: int
+    min_robustness: float
+    complete: bool
+
+    @property
+    def found(self) -> bool:
+        return len(self.witnesses) > 0
+
+    @property
+    def conflicts(self) -> int:
+        """number of conflicting steps found"""
+        return len(self.witnesses)
+
+    @property
+    def first_conflict(self) -> int:
+        """first step with a predicted feature conflict, -1 if none"""
+        return self.witnesses[0].step if self.found else -1
+
+
+class Mission_Result:
+    """store the outcome of a mission execution
+
+    Attributes:
+        self.signal_data_val: [(id, exe_signal, pred_signals), ...], in the format consumed by the Visualizer
+        self.messages_val: one message per execution step (the last one is a placeholder)
+        self.step_robustness_val: per-step min robustness over every drone
+        self.step_conflict_val: per-step flag, whether a feature conflict was predicted
+        self.complete_val: whether the mission ran to completion (rather than stopping at max_step)
+        self.width_val, self.height_val: the dimension of the map the mission ran on
+    """
+    def __init__(self,
+                 signal_data: list[Tuple[str, Trajectory, list[Trajectory]]],
+                 messages: list[str],
+                 step_robustness: list[float],
+                 step_conflict: list[bool],
+                 complete: bool,
+                 width: int,
+                 height: int):
+        self.signal_data_val = signal_data
+        self.messages_val = messages
+        self.step_robustness_val = step_robustness
+        self.step_conflict_val = step_conflict
+        self.complete_val = complete
+        self.width_val = width
+        self.height_val = height
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def signal_data(self) -> list[Tuple[str, Trajectory, list[Trajectory]]]:
+        return self.signal_data_val
+
+    @property
+    def messages(self) -> list[str]:
+        return self.messages_val
+
+    @property
+    def step_robustness(self) -> list[float]:
+        return self.step_robustness_val
+
+    @property
+    def step_conflict(self) -> list[bool]:
+        return self.step_conflict_val
+
+    @property
+    def complete(self) -> bool:
+        return self.complete_val
+
+    @property
+    def width(self) -> int:
+        return self.width_val
+
+    @property
+    def height(self) -> int:
+        return self.height_val
+
+    @property
+    def steps(self) -> int:
+        """number of executed steps"""
+        return len(self.step_robustness_val)
+
+    @property
+    def min_robustness(self) -> float:
+        """min robustness over every step and every drone"""
+        return min(self.step_robustness_val, default=DEFAULT_ROBUSTNESS)
+
+    @property
+    def conflicts(self) -> int:
+        """number of steps with a predicted feature conflict"""
+        return sum(self.step_conflict_val)
+
+    @property
+    def first_conflict(self) -> int:
+        """first step with a predicted feature conflict, -1 if none"""
+        return self.step_conflict_val.index(True) if True in self.step_conflict_val else -1
+
+    def render(self) -> None:
+        """visualize the signal data (the visualizer, and matplotlib with it, is only imported here)"""
+        from src.obj.visualizer import Visualizer
+
+        visual = Visualizer(width=self.width, height=self.height, signal_data=self.signal_data,
+                            messages=self.messages)  # init visualizer
+        visual.show()  # start visualizer
+
+    def export(self, path: str, **kwargs) -> None:
+        """render the signal data offscreen to a frame directory or an animated file, see Visualizer.export"""
+        from src.obj.visualizer import Visualizer
+
+        visual = Visualizer(width=self.width, height=self.height, signal_data=self.signal_data,
+                            messages=self.messages)
+        visual.export(path, **kwargs)
@@ -0,0 +1,235 @@
+# mission engine for swarms of drones, generalizing the ego/chaser pair of the checkpoint mission
+
+from src.obj.map import Coord, Map
+from src.obj.map_util.spatial_index import Proximity_Report, Spatial_Index
+from src.obj.trajectory import Trajectory
+from src.mission.planner import greedy_advance
+from typing import Optional, Tuple
+import numpy as np
+
+
+class Swarm_Mission:
+    """mission of N drones on one map. every drone either flies a checkpoint route (like the ego drone of the
+    checkpoint mission), or chases another drone (like the chaser drone, using the outdated location of its target)
+
+    the state of the drones is held as struct-of-arrays (one array entry per drone), and every drone is planned in one
+    vectorized pass per step
+
+    Usage:
+        >>> sm = Swarm_Mission(map_width=20, map_height=20)
+        >>> ego = sm.add_checkpoint_drone("Ego", Coord(1, 10), [Coord(10, 19), Coord(19, 1)])
+        >>> chaser = sm.add_chaser_drone("Chaser", Coord(1, 1), target=ego)
+        >>> sm.init()
+        >>> signal_data = sm.execute(max_step=30, pred_step=4)
+        >>> [id_val for id_val, _, _ in signal_data]
+        ['Ego', 'Chaser']
+        >>> len(sm.proximity_reports)  # one collision / near-miss report per executed step, and the initial one
+        28
+    """
+    def __init__(self, map_width: int, map_height: int, collision_radius: float = 0, near_miss_radius: float = 1.5):
+        self.map_width_val = map_width
+        self.map_height_val = map_height
+        self.collision_radius_val = collision_radius  # drones within this distance collide
+        self.near_miss_radius_val = near_miss_radius  # drones within this distance (but not colliding) nearly miss
+
+        # drone specifications, in the order they are added
+        self.ids_val: list[str] = list()
+        self.init_locs_val: list[Coord] = list()
+        self.routes_val: list[list[Coord]] = list()  # checkpoint route of every drone, empty for chasers
+        self.targets_val: list[int] = list()  # drone chased by every drone, -1 for checkpoint drones
+
+        # struct-of-arrays state, initialized by init()
+        self._map: Optional[Map] = None
+        self._loc: Optional[np.ndarray] = None  # (N,) current flattened map index of every drone
+        self._route: Optional[np.ndarray] = None  # (N, max route length) checkpoint indices, padded with -1
+        self._route_length: Optional[np.ndarray] = None  # (N,) number of checkpoints of every drone
+        self._leg: Optional[np.ndarray] = None  # (N,) index of the checkpoint every drone currently heads to
+        self._target: Optional[np.ndarray] = None  # (N,) drone chased by every drone, -1 for checkpoint drones
+        self._index: Optional[Spatial_Index] = None  # spatial index of the current drone locations
+        self.proximity_reports_val: list[Proximity_Report] = list()  # per executed step (and the initial locations)
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def map_width(self):
+        return self.map_width_val
+
+    @property
+    def map_height(self):
+        return self.map_height_val
+
+    @property
+    def ids(self) -> list[str]:
+        return self.ids_val
+
+    @property
+    def map(self) -> Optional[Map]:
+        return self._map
+
+    @property
+    def loc(self) -> Optional[np.ndarray]:
+        """(N,) current flattened map index of every drone"""
+        return self._loc
+
+    @property
+    def spatial_index(self) -> Optional[Spatial_Index]:
+        return self._index
+
+    @property
+    def proximity_reports(self) -> list[Proximity_Report]:
+        return self.proximity_reports_val
+
+    def __len__(self):
+        return len(self.ids_val)
+
+    ##########
+    # drones #
+    ##########
+
+    def add_checkpoint_drone(self, id: str, init_loc: Coord, checkpoints: list[Coord]) -> int:
+        """add a drone flying the checkpoints in order, return the drone number"""
+        return self._add_drone(id=id, init_loc=init_loc, checkpoints=checkpoints, target=-1)
+
+    def add_chaser_drone(self, id: str, init_loc: Coord, target: int) -> int:
+        """add a drone chasing the target drone (given by drone number), return the drone number"""
+        if not 0 <= target < len(self):
+            raise RuntimeError("unable to chase drone #" + str(target) + ", no such drone")
+
+        return self._add_drone(id=id, init_loc=init_loc, checkpoints=list(), target=target)
+
+    def _add_drone(self, id: str, init_loc: Coord, checkpoints: list[Coord], target: int) -> int:
+        self.ids_val.append(id)
+        self.init_locs_val.append(init_loc)
+        self.routes_val.append(list(checkpoints))
+        self.targets_val.append(target)
+        return len(self) - 1
+
+    def init(self) -> None:
+        """initialize the map and the struct-of-arrays state of the drones"""
+        self._map = Map(width=self.map_width, height=self.map_height)
+
+        self._loc = np.array([self._map.index(self._map.map_cell(init_loc)) for init_loc in self.init_locs_val],
+                             dtype=np.int64)
+
+        self._route_length = np.array([len(route) for route in self.routes_val], dtype=np.int64)
+        self._route = np.full((len(self), max(self._route_length, default=0) + 1), -1, dtype=np.int64)
+        for drone, route in enumerate(self.routes_val):
+            self._route[drone, :len(route)] = [self._map.index(self._map.map_cell(checkpoint)) for checkpoint in route]
+
+        self._leg = np.zeros(len(self), dtype=np.int64)
+        self._target = np.array(self.targets_val, dtype=np.int64)
+        self._advance_legs()
+
+        self._index = Spatial_Index(self._map)
+        self.proximity_reports_val = list()
+        self._update_index()
+
+    def _update_index(self) -> None:
+        """move the drones in the spatial index to their current locations, and record the proximity report"""
+        x, y = self._map.indices_to_xy(self._loc)
+        self._index.update_all(x, y)
+        self.proximity_reports_val.append(self._index.proximity_report(collision_radius=self.collision_radius_val,
+                                                                       near_miss_radius=self.near_miss_radius_val))
+
+    def nearest(self, drone: int, k: int = 1) -> list[int]:
+        """the k drones nearest to the given drone (by drone number), excluding itself"""
+        x, y = self._map.indices_to_xy(self._loc[drone])
+        return self._index.k_nearest(int(x), int(y), k, exclude=drone)
+
+    ############
+    # planning #
+    ############
+
+    def _advance_legs(self) -> None:
+        """move every checkpoint drone located on its current checkpoint on to its next checkpoint"""
+        drones = np.arange(len(self))
+
+        while True:
+            reached = (self._leg < self._route_length) & (self._route[drones, self._leg] == self._loc)
+            if not reached.any():
+                break
+
+            self._leg[reached] += 1
+
+    @property
+    def complete(self) -> bool:
+        """whether every checkpoint drone has reached its last checkpoint"""
+        return bool((self._leg >= self._route_length).all())
+
+    def headings(self) -> np.ndarray:
+        """(N,) flattened map index of the current checkpoint of every checkpoint drone, -1 for drones without a
+        (remaining) checkpoint"""
+        return np.where(self._leg < self._route_length, self._route[np.arange(len(self)), self._leg], -1)
+
+    def plan(self, loc: np.ndarray, headings: np.ndarray) -> np.ndarray:
+        """plan the next location of every drone in one vectorized pass
+
+        checkpoint drones head to their checkpoint (and remain in place without one), chasers head to the current
+        (soon to be outdated) location of their target
+        """
+        targets = np.where(self._target >= 0, loc[self._target], np.where(headings >= 0, headings, loc))
+        return greedy_advance(self._map, loc, targets)
+
+    def predict(self, pred_step: int) -> np.ndarray:
+        """roll out pred_step planner steps for every drone at once, the headings remain fixed during the rollout
+
+        return the (pred_step + 1, N) flattened map indices, the first row being the current locations
+        """
+        headings = self.headings()
+        rollout = np.empty((pred_step + 1, len(self)), dtype=np.int64)
+        rollout[0] = self._loc
+
+        for step in range(pred_step):
+            rollout[step + 1] = self.plan(rollout[step], headings)
+
+        return rollout
+
+    #############
+    # execution #
+    #############
+
+    def execute(self, max_step=30, pred_step=4) -> list[Tuple[str, Trajectory, list[Trajectory]]]:
+        """simulate runtime of the drones, until every checkpoint drone completed its route or max_step is reached.
+        the step budget is counted as by the checkpoint mission: the step exhausting max_step is followed by one more
+        step (at most max_step + 1 steps), unless a checkpoint was reached on it
+
+        return [(id, exe_signal, pred_signals), ...] for every drone, in the format consumed by the Visualizer
+        """
+        exe: list[np.ndarray] = [self._loc.copy()]  # per step, (N,) locations
+        preds: list[np.ndarray] = list()  # per step, (pred_step + 1, N) predicted locations
+
+        budget = max_step  # steps left
+        reached = bool((self._leg > 0).any())  # whether the last step reached a checkpoint (init, for the first one)
+
+        while not self.complete and not (budget <= 0 and reached):
+            rollout = self.predict(pred_step)
+            preds.append(rollout)
+
+            # the executed step is the first predicted step (the planner is deterministic)
+            self._loc = rollout[1].copy() if pred_step > 0 else self.plan(self._loc, self.headings())
+            legs = self._leg.copy()
+            self._advance_legs()
+            reached = bool((self._leg != legs).any())
+            self._update_index()
+            exe.append(self._loc.copy())
+
+            if budget <= 0:
+                break
+            budget -= 1
+
+        # append placeholder predictive signal to enforce consistency
+        preds.append(self._loc[None, :].copy())
+
+        return self.signal_data(np.stack(exe), preds)
+
+    def signal_data(self, exe: np.ndarray, preds: list[np.ndarray]) -> list[Tuple[str, Trajectory, list[Trajectory]]]:
+        """convert the (steps, N) execution and per-step (horizon, N) predicted indices to per-drone trajectories"""
+        exe_x, exe_y = self._map.indices_to_xy(exe)
+        pred_xy = [self._map.indices_to_xy(pred) for pred in preds]
+
+        return [(id_val,
+                 Trajectory.from_columns(np.stack((exe_x[:, drone], exe_y[:, drone]))),
+                 [Trajectory.from_columns(np.stack((pred_x[:, drone], pred_y[:, drone]))) for pred_x, pred_y in pred_xy])
+                for drone, id_val in enumerate(self.ids_val)]
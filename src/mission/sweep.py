@@ -0,0 +1,153 @@
+# headless parameter sweep over checkpoint missions, fanned out over a process pool
+#
+# Usage:
+#     bin/featuresweep --map-size 20x20 40x40 --pred-step 4 8 --ego 1,10 --chaser 1,1 --checkpoints "10,19;19,1"
+#     bin/featuresweep --map-size 20x20 40x40 --search 1  # only find the first conflict of every mission
+
+from src.obj.map import Coord
+from src.mission.checkpoint import Checkpoint_Mission
+from typing import NamedTuple, Optional, TextIO, Tuple
+from multiprocessing import Pool
+import argparse
+import contextlib
+import csv
+import functools
+import itertools
+import math
+import os
+import sys
+import numpy as np
+
+# compact per-mission summary table, one row per scenario
+SUMMARY_DTYPE = np.dtype([
+    ("scenario", np.int32),  # index of the scenario in the sweep
+    ("steps", np.int32),  # number of executed steps
+    ("min_robustness", np.float64),  # min robustness over every step and both drones
+    ("conflicts", np.int32),  # number of steps with a predicted feature conflict
+    ("first_conflict", np.int32),  # first step with a predicted feature conflict, -1 if none
+    ("complete", np.bool_)  # whether the ego drone reached its last checkpoint
+])
+
+
+class Scenario(NamedTuple):
+    """parameters of a single checkpoint mission (plain tuples, cheap to send to worker processes)"""
+    map_width: int
+    map_height: int
+    ego_init_loc: Tuple[int, int]
+    chaser_init_loc: Tuple[int, int]
+    checkpoints: Tuple[Tuple[int, int], ...]
+    pred_step: int
+    max_step: int = 30
+
+
+def scenario_grid(map_sizes: list[Tuple[int, int]],
+                  ego_init_locs: list[Tuple[int, int]],
+                  chaser_init_locs: list[Tuple[int, int]],
+                  checkpoint_lists: list[Tuple[Tuple[int, int], ...]],
+                  pred_steps: list[int],
+                  max_step: int = 30) -> list[Scenario]:
+    """cartesian product of the scenario parameters"""
+    return [Scenario(map_width=width, map_height=height, ego_init_loc=ego_init_loc, chaser_init_loc=chaser_init_loc,
+                     checkpoints=tuple(checkpoints), pred_step=pred_step, max_step=max_step)
+            for (width, height), ego_init_loc, chaser_init_loc, checkpoints, pred_step
+            in itertools.product(map_sizes, ego_init_locs, chaser_init_locs, checkpoint_lists, pred_steps)]
+
+
+def run_scenario(scenario: Scenario, search: Optional[int] = None) -> Tuple[int, float, int, int, bool]:
+    """run a single mission, return (steps, min robustness, conflicts, first conflict, complete)
+
+    @:param search: run in conflict-search mode, stopping at the given number of conflicting steps (the summary then
+                    covers the steps executed until the stop)
+    """
+    cm = Checkpoint_Mission(map_width=scenario.map_width,
+                            map_height=scenario.map_height,
+                            ego_init_loc=Coord(*scenario.ego_init_loc),
+                            chaser_init_loc=Coord(*scenario.chaser_init_loc),
+                            checkpoints=[Coord(*checkpoint) for checkpoint in scenario.checkpoints])
+
+    if search is not None:
+        result = cm.search_conflicts(max_step=scenario.max_step, pred_step=scenario.pred_step, k=search)
+    else:
+        result = cm.run(max_step=scenario.max_step, pred_step=scenario.pred_step)
+
+    return result.steps, result.min_robustness, result.conflicts, result.first_conflict, result.complete
+
+
+def sweep(scenarios: list[Scenario], processes: Optional[int] = None, chunksize: Optional[int] = None,
+          search: Optional[int] = None) -> np.ndarray:
+    """run every scenario over a process pool, return the summary table (SUMMARY_DTYPE), ordered by scenario
+
+    @:param scenarios: the missions to run
+    @:param processes: number of worker processes, default to every core
+    @:param chunksize: number of scenarios sent to a worker at once, default to ~4 chunks per worker
+    @:param search: run the missions in conflict-search mode, see run_scenario
+    """
+    if search is not None and search < 1:  # checked before any worker starts
+        raise RuntimeError("unable to search for " + str(search) + " conflicting steps, expecting at least 1")
+
+    processes = processes or os.cpu_count() or 1
+    chunksize = chunksize or max(1, math.ceil(len(scenarios) / (4 * processes)))
+
+    table = np.zeros(len(scenarios), dtype=SUMMARY_DTYPE)
+    run = functools.partial(run_scenario, search=search)
+
+    with contextlib.ExitStack() as stack:
+        if processes == 1:
+            summaries = map(run, scenarios)
+        else:
+            pool = stack.enter_context(Pool(processes=processes))
+            summaries = pool.imap(run, scenarios, chunksize=chunksize)
+
+        for index, summary in enumerate(summaries):
+            table[index] = (index,) + summary
+
+    return table
+
+
+def write_table(table: np.ndarray, scenarios: list[Scenario], file: TextIO) -> None:
+    """write the summary table, joined with the scenario parameters, as CSV"""
+    writer = csv.writer(file)
+    writer.writerow(Scenario._fields + SUMMARY_DTYPE.names[1:])
+
+    for scenario, row in zip(scenarios, table.tolist()):
+        writer.writerow([scenario.map_width, scenario.map_height,
+                         "%d,%d" % scenario.ego_init_loc, "%d,%d" % scenario.chaser_init_loc,
+                         ";".join("%d,%d" % checkpoint for checkpoint in scenario.checkpoints),
+                         scenario.pred_step, scenario.max_step] + list(row[1:]))
+
+
+def parse_pair(text: str, separator: str = ",") -> Tuple[int, int]:
+    first, second = text.split(separator)
+    return int(first), int(second)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="headless parameter sweep over checkpoint missions")
+    parser.add_argument("--map-size", nargs="+", default=["20x20"], help="map sizes, WIDTHxHEIGHT")
+    parser.add_argument("--ego", nargs="+", default=["1,10"], help="ego drone initial locations, X,Y")
+    parser.add_argument("--chaser", nargs="+", default=["1,1"], help="chaser drone initial locations, X,Y")
+    parser.add_argument("--checkpoints", nargs="+", default=["10,19;19,1"], help="checkpoint lists, X,Y;X,Y;...")
+    parser.add_argument("--pred-step", nargs="+", type=int, default=[4], help="prediction horizons")
+    parser.add_argument("--max-step", type=int, default=30, help="maximum number of steps per mission")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=None, help="number of scenarios per worker task")
+    parser.add_argument("--search", type=int, default=None, metavar="K",
+                        help="conflict-search mode, stop every mission at its K-th conflicting step")
+    args = parser.parse_args(argv)
+    if args.search is not None and args.search < 1:
+        parser.error("--search expects at least 1 conflicting step")
+
+    scenarios = scenario_grid(map_sizes=[parse_pair(size, "x") for size in args.map_size],
+                              ego_init_locs=[parse_pair(loc) for loc in args.ego],
+                              chaser_init_locs=[parse_pair(loc) for loc in args.chaser],
+                              checkpoint_lists=[tuple(parse_pair(loc) for loc in checkpoints.split(";"))
+                                                for checkpoints in args.checkpoints],
+                              pred_steps=args.pred_step,
+                              max_step=args.max_step)
+
+    table = sweep(scenarios, processes=args.processes, chunksize=args.chunksize, search=args.search)
+    write_table(table, scenarios, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
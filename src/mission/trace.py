@@ -0,0 +1,343 @@
+# compact binary trace archive of mission results: a chunk per run, fixed-width arrays, read through a memory map
+#
+# file layout (little-endian):
+#     file header   FILE_HEADER (magic, version)
+#     run chunks    RUN_HEADER, then the metadata (JSON: drone ids, fields, message table) and the arrays, each array
+#                   starting on an 8-byte boundary
+#                       exe              int32   (drones, fields, exe length)      execution signals
+#                       pred_offsets     int64   (drones, windows + 1)              window boundaries in preds
+#                       preds            int32   (fields, prediction samples)       every prediction window, in order
+#                       message_codes    uint16  (messages,)                        index in the message table
+#                       step_robustness  float64 (steps,)
+#                       step_conflict    uint8   (steps,)
+#     index         int64 (runs,), the offset of every run chunk
+#     footer        FOOTER (index offset, number of runs, magic)
+#
+# an archive without its index (e.g. a writer interrupted before closing) is still readable: the reader then walks
+# the chunks, whose headers hold their size
+#
+# Usage:
+#     with Trace_Writer("runs.trace") as writer:
+#         writer.write(Checkpoint_Mission(...).run())
+#     with Trace_Reader("runs.trace") as reader:
+#         reader.result(0).render()
+
+from src.obj.trajectory import Trajectory
+from src.mission.result import Mission_Result
+import json
+import mmap
+import struct
+import numpy as np
+
+FILE_MAGIC = b"FTRACE"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<6sH")  # magic, version
+RUN_MAGIC = b"FRUN"
+# magic, chunk size (bytes, header included), drones, fields, exe length, prediction windows, prediction samples,
+# messages, steps, map width, map height, complete, metadata size (bytes)
+RUN_HEADER = struct.Struct("<4sQIIIIIIIII?I")
+FOOTER_MAGIC = b"FEND"
+FOOTER = struct.Struct("<QQ4s")  # index offset, number of runs, magic
+ALIGNMENT = 8
+
+MESSAGE_CODE_DTYPE = np.uint16  # messages are coded as indices in the per-run table of distinct messages
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+class Trace_Writer:
+    """append mission results to a trace archive, the index is written on close
+
+    Usage:
+        >>> import tempfile, os
+        >>> from src.obj.map import Coord
+        >>> from src.mission.checkpoint import Checkpoint_Mission
+        >>> path = os.path.join(tempfile.mkdtemp(), "runs.trace")
+        >>> cm = Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10), chaser_init_loc=Coord(1, 1),
+        ...                         checkpoints=[Coord(10, 19), Coord(19, 1)])
+        >>> with Trace_Writer(path) as writer:
+        ...     writer.write(cm.run())
+        0
+        >>> with Trace_Reader(path) as reader:
+        ...     len(reader), reader.run(0).ids
+        (1, ['Ego', 'Chaser'])
+    """
+    def __init__(self, path: str):
+        self.path_val = path
+        self._file = open(path, "wb")
+        self._file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+        self._offsets: list[int] = list()
+
+    @property
+    def path(self) -> str:
+        return self.path_val
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def write(self, result: Mission_Result) -> int:
+        """append the result as a run chunk, return its run number"""
+        if self._file is None:
+            raise RuntimeError("trace archive \"" + self.path_val + "\" is closed")
+
+        ids = [id_val for id_val, _, _ in result.signal_data]
+        fields = list(result.signal_data[0][1].fields) if len(result.signal_data) > 0 else ["x", "y"]
+
+        exe = np.array([exe_signal.columns for _, exe_signal, _ in result.signal_data], dtype=np.int32).reshape(
+            len(ids), len(fields), -1)
+
+        windows = len(result.signal_data[0][2]) if len(result.signal_data) > 0 else 0
+        pred_columns = [pred_signal.columns
+                        for _, _, pred_signals in result.signal_data for pred_signal in pred_signals]
+        preds = np.ascontiguousarray(np.concatenate(pred_columns, axis=1) if pred_columns else
+                                     np.zeros((len(fields), 0)), dtype=np.int32)
+
+        lengths = np.array([[len(pred_signal) for pred_signal in pred_signals]
+                            for _, _, pred_signals in result.signal_data], dtype=np.int64).reshape(len(ids), windows)
+        pred_offsets = np.zeros((len(ids), windows + 1), dtype=np.int64)
+        pred_offsets[:, 1:] = np.cumsum(lengths.ravel()).reshape(len(ids), windows)
+        pred_offsets[1:, 0] = pred_offsets[:-1, -1]  # the windows of every drone follow those of the previous one
+
+        message_table: dict[str, int] = dict()
+        message_codes = np.array([message_table.setdefault(message, len(message_table))
+                                  for message in result.messages], dtype=np.int64)
+        if len(message_table) > np.iinfo(MESSAGE_CODE_DTYPE).max + 1:
+            raise RuntimeError("too many distinct messages in a run (" + str(len(message_table)) + ")")
+
+        metadata = json.dumps({"ids": ids, "fields": fields, "messages": list(message_table)}).encode("utf-8")
+
+        arrays = [exe, pred_offsets, preds, message_codes.astype(MESSAGE_CODE_DTYPE),
+                  np.array(result.step_robustness, dtype=np.float64),
+                  np.array(result.step_conflict, dtype=np.uint8)]
+
+        body = bytearray(metadata)
+        for array in arrays:
+            body += bytes(_padding(RUN_HEADER.size + len(body)))
+            body += np.ascontiguousarray(array).astype(array.dtype.newbyteorder("<"), copy=False).tobytes()
+        body += bytes(_padding(RUN_HEADER.size + len(body)))  # the next chunk starts on an 8-byte boundary too
+
+        offset = self._file.tell()
+        self._file.write(RUN_HEADER.pack(RUN_MAGIC, RUN_HEADER.size + len(body), len(ids), len(fields), exe.shape[2],
+                                         windows, preds.shape[1], len(result.messages), len(result.step_robustness),
+                                         result.width, result.height, bool(result.complete), len(metadata)))
+        self._file.write(body)
+        self._offsets.append(offset)
+
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        """write the index and the footer, and close the archive"""
+        if self._file is None:
+            return
+
+        index_offset = self._file.tell()
+        self._file.write(np.array(self._offsets, dtype="<i8").tobytes())
+        self._file.write(FOOTER.pack(index_offset, len(self._offsets), FOOTER_MAGIC))
+        self._file.close()
+        self._file = None
+
+
+class Trace_Run:
+    """one run of a trace archive. the arrays are zero-copy views of the memory-mapped archive, decoded lazily"""
+    def __init__(self, buffer, offset: int):
+        (magic, self.size_val, drones, fields, exe_length, windows, pred_samples, messages, steps, self.width_val,
+         self.height_val, self.complete_val, metadata_size) = RUN_HEADER.unpack_from(buffer, offset)
+
+        if magic != RUN_MAGIC:
+            raise RuntimeError("no trace run at offset " + str(offset))
+
+        position = offset + RUN_HEADER.size
+        metadata = json.loads(bytes(buffer[position:position + metadata_size]).decode("utf-8"))
+        self.ids_val: list[str] = metadata["ids"]
+        self.fields_val: tuple[str, ...] = tuple(metadata["fields"])
+        self.message_table_val: list[str] = metadata["messages"]
+        position += metadata_size
+
+        arrays = list()
+        for dtype, shape in (("<i4", (drones, fields, exe_length)),
+                             ("<i8", (drones, windows + 1)),
+                             ("<i4", (fields, pred_samples)),
+                             (np.dtype(MESSAGE_CODE_DTYPE).newbyteorder("<"), (messages,)),
+                             ("<f8", (steps,)),
+                             ("u1", (steps,))):
+            position += _padding(position - offset)
+            count = int(np.prod(shape))
+            arrays.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=position).reshape(shape))
+            position += count * np.dtype(dtype).itemsize
+
+        self.exe_val, self.pred_offsets_val, self.preds_val, self.message_codes_val, self.step_robustness_val, \
+            self.step_conflict_val = arrays
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def size(self) -> int:
+        """size of the run chunk, in bytes"""
+        return self.size_val
+
+    @property
+    def ids(self) -> list[str]:
+        return self.ids_val
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        return self.fields_val
+
+    @property
+    def width(self) -> int:
+        return self.width_val
+
+    @property
+    def height(self) -> int:
+        return self.height_val
+
+    @property
+    def complete(self) -> bool:
+        return self.complete_val
+
+    @property
+    def exe(self) -> np.ndarray:
+        """(drones, fields, exe length) execution signals"""
+        return self.exe_val
+
+    @property
+    def pred_offsets(self) -> np.ndarray:
+        """(drones, windows + 1) boundaries of the prediction windows of every drone in preds"""
+        return self.pred_offsets_val
+
+    @property
+    def preds(self) -> np.ndarray:
+        """(fields, prediction samples) every prediction window of every drone, concatenated"""
+        return self.preds_val
+
+    @property
+    def message_codes(self) -> np.ndarray:
+        return self.message_codes_val
+
+    @property
+    def message_table(self) -> list[str]:
+        return self.message_table_val
+
+    @property
+    def messages(self) -> list[str]:
+        return [self.message_table_val[code] for code in self.message_codes_val.tolist()]
+
+    @property
+    def step_robustness(self) -> np.ndarray:
+        return self.step_robustness_val
+
+    @property
+    def step_conflict(self) -> np.ndarray:
+        return self.step_conflict_val.astype(np.bool_)
+
+    ############
+    # decoding #
+    ############
+
+    def exe_trajectory(self, drone: int) -> Trajectory:
+        return Trajectory.from_columns(self.exe_val[drone], fields=self.fields_val)
+
+    def pred_trajectory(self, drone: int, window: int) -> Trajectory:
+        begin, end = self.pred_offsets_val[drone, window:window + 2].tolist()
+        return Trajectory.from_columns(self.preds_val[:, begin:end], fields=self.fields_val)
+
+    def pred_trajectories(self, drone: int) -> list[Trajectory]:
+        return [self.pred_trajectory(drone, window) for window in range(self.pred_offsets_val.shape[1] - 1)]
+
+    def to_result(self) -> Mission_Result:
+        """the mission result of the run (e.g. to render it), the trajectories are views of the archive"""
+        step_robustness = self.step_robustness_val.tolist()
+        if all(robustness.is_integer() for robustness in step_robustness):
+            step_robustness = [int(robustness) for robustness in step_robustness]
+
+        return Mission_Result(signal_data=[(id_val, self.exe_trajectory(drone), self.pred_trajectories(drone))
+                                           for drone, id_val in enumerate(self.ids_val)],
+                              messages=self.messages,
+                              step_robustness=step_robustness,
+                              step_conflict=self.step_conflict.tolist(),
+                              complete=self.complete_val,
+                              width=self.width_val,
+                              height=self.height_val)
+
+
+class Trace_Reader:
+    """memory-mapped reader of a trace archive, a run is only decoded when requested. the runs and results stay
+    valid after the reader is closed"""
+    def __init__(self, path: str):
+        self.path_val = path
+        self._file = open(path, "rb")
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = FILE_HEADER.unpack_from(self._buffer, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise RuntimeError("\"" + path + "\" is not a trace archive (version " + str(FILE_VERSION) + ")")
+
+        self.offsets_val = self._read_index()
+
+    def _read_index(self) -> np.ndarray:
+        """the offset of every run, from the index, or by walking the chunks when the index is missing"""
+        if len(self._buffer) >= FILE_HEADER.size + FOOTER.size:
+            index_offset, runs, magic = FOOTER.unpack_from(self._buffer, len(self._buffer) - FOOTER.size)
+            if magic == FOOTER_MAGIC:
+                return np.frombuffer(self._buffer, dtype="<i8", count=runs, offset=index_offset)
+
+        offsets = list()
+        offset = FILE_HEADER.size
+        while offset + RUN_HEADER.size <= len(self._buffer):
+            magic, size = RUN_HEADER.unpack_from(self._buffer, offset)[:2]
+            if magic != RUN_MAGIC or offset + size > len(self._buffer):  # truncated run
+                break
+
+            offsets.append(offset)
+            offset += size
+
+        return np.array(offsets, dtype=np.int64)
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def path(self) -> str:
+        return self.path_val
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self.offsets_val
+
+    def __len__(self):
+        return len(self.offsets_val)
+
+    def run(self, index: int) -> Trace_Run:
+        return Trace_Run(self._buffer, int(self.offsets_val[index]))
+
+    def result(self, index: int) -> Mission_Result:
+        return self.run(index).to_result()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.offsets_val = None  # release the views of the memory map before closing it
+            try:
+                self._buffer.close()
+            except BufferError:
+                pass  # runs or results loaded from the archive still view the map, it is unmapped with the last one
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
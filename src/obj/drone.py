@@ -5,6 +5,8 @@
 
 from typing import Optional
 from src.obj.map import Map_Cell, Map
+from src.obj.trajectory import Trajectory
+import numpy as np
 
 
 class Drone:
@@ -52,7 +54,7 @@ class Drone:
     def loc(self, map_cell: Map_Cell):
         if self.loc_val is None:
             self.loc_val = map_cell
-        elif map_cell in self.map_val.neighbor(self.loc_val) or map_cell == self.loc_val:  # the next coordinate can be itself
+        elif self.map_val.valid_move(self.loc_val, map_cell):  # the next coordinate can be itself
             self.loc_val = map_cell
         else:
             raise RuntimeError("cannot assign drone to coordinates other than the current neighbors")
@@ -65,6 +67,22 @@ class Drone:
     def map(self, map_val: Map):
         self.map_val = map_val
 
+    def validate_trajectory(self, trajectory: Trajectory) -> int:
+        """validate a whole (e.g. recorded) trajectory of the drone in one call, without moving the drone
+
+        return the index of the first sample that cannot be reached from the previous one (or is out of bound for
+        the first sample), -1 if the whole trajectory is valid
+        """
+        x, y = trajectory.column("x"), trajectory.column("y")
+
+        if len(trajectory) == 0:
+            return -1
+        if not (0 <= x[0] < self.map_val.width and 0 <= y[0] < self.map_val.height):
+            return 0
+
+        invalid_steps = np.flatnonzero(~self.map_val.valid_moves(x, y))
+        return int(invalid_steps[0]) + 1 if len(invalid_steps) > 0 else -1
+
 
 # class Drone(metaclass=abc.ABCMeta):
 #     """super class, support different types of drones
@@ -1,10 +1,26 @@
 # Simon Chu
 # Mon Jan 18 12:00:56 EST 2021
 from math import sqrt
+from typing import Tuple
+
+INTERN_RANGE = 256  # coordinates with 0 <= x, y < INTERN_RANGE are interned, i.e. share a single instance
+
+# (dx, dy) offsets of the 8 (surrounding) neighbors of a coordinate, in the order returned by Coord.neighbor
+NEIGHBOR_OFFSETS: Tuple[Tuple[int, int], ...] = (
+    (-1, -1),
+    (-1, 0),
+    (-1, 1),
+    (0, -1),
+    (0, 1),
+    (1, -1),
+    (1, 0),
+    (1, 1)
+)
 
 
 class Coord:
-    """encapsulate 2D cooridnates information
+    """encapsulate 2D cooridnates information. Coord is an immutable, hashable value type (usable in sets and as dict
+    keys), small coordinates are interned
 
     Usage:
         >>> coord = Coord(1, 2)
@@ -12,55 +28,65 @@ class Coord:
         1
         >>> coord.y
         2
+        >>> coord in {Coord(1, 2)}
+        True
+        >>> coord is Coord(1, 2)
+        True
     """
-    def __init__(self, x: int, y: int):
-        self.x_val = x  # x coordinate
-        self.y_val = y  # y coordinate
+    __slots__ = ("x", "y")
 
-    #######################
-    # getters and setters #
-    #######################
-    @property
-    def x(self):
-        return self.x_val
+    _interned: dict[Tuple[int, int], 'Coord'] = dict()  # interned small coordinates, filled lazily
 
-    @x.setter
-    def x(self, x: int):
-        self.x_val = x
+    def __new__(cls, x: int, y: int):
+        if 0 <= x < INTERN_RANGE and 0 <= y < INTERN_RANGE:
+            coord = cls._interned.get((x, y))
 
-    @property
-    def y(self):
-        return self.y_val
+            if coord is None:
+                coord = cls._create(x, y)
+                cls._interned[(x, y)] = coord
+
+            return coord
+
+        return cls._create(x, y)
+
+    @classmethod
+    def _create(cls, x: int, y: int) -> 'Coord':
+        coord = object.__new__(cls)
+        object.__setattr__(coord, "x", x)  # x coordinate
+        object.__setattr__(coord, "y", y)  # y coordinate
+        return coord
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Coord is immutable")
 
-    @y.setter
-    def y(self, y: int):
-        self.y_val = y
+    def __delattr__(self, key):
+        raise AttributeError("Coord is immutable")
+
+    def __reduce__(self):
+        return Coord, (self.x, self.y)
 
     @property
     def neighbor(self) -> list['Coord']:
         """return list of 8 (surrounding) neighbors around the coordinates"""
-        result = [
-            Coord(self.x - 1, self.y - 1),
-            Coord(self.x - 1, self.y),
-            Coord(self.x - 1, self.y + 1),
-            Coord(self.x, self.y - 1),
-            Coord(self.x, self.y + 1),
-            Coord(self.x + 1, self.y - 1),
-            Coord(self.x + 1, self.y),
-            Coord(self.x + 1, self.y + 1)
-        ]
-
-        return result
+        return [Coord(self.x + dx, self.y + dy) for dx, dy in NEIGHBOR_OFFSETS]
 
     def distance_to(self, other: 'Coord') -> float:
         """calculate the distance between 2 coordinates"""
         return sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
 
     def __eq__(self, other):
-        if other is not None:
-            return self.x == other.x and self.y == other.y
-        else:
+        if other is self:
+            return True
+        elif other is None or not hasattr(other, "x") or not hasattr(other, "y"):
             return False
+        else:
+            return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return "Coord(" + str(self.x) + ", " + str(self.y) + ")"
 
     def __str__(self):
         return "Coord: ( " + str(self.x) + ", " + str(self.y) + " )"
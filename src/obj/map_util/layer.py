@@ -0,0 +1,138 @@
+# named, typed per-cell attribute layers of the map, indexed by the flattened map index
+
+from typing import Union
+import numpy as np
+
+Value = Union[int, float, bool]
+
+
+class Dense_Layer:
+    """one typed value per cell, stored in a single numpy array
+
+    Usage:
+        >>> layer = Dense_Layer(size=4, dtype=np.int32, default=0)
+        >>> layer.set(2, 7)
+        >>> layer.get(2)
+        7
+        >>> layer.get_many(np.array([1, 2])).tolist()
+        [0, 7]
+    """
+    def __init__(self, size: int, dtype=np.int32, default: Value = 0):
+        self.default_val = default
+        self.values_val: np.ndarray = np.full(size, default, dtype=dtype)
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def dtype(self):
+        return self.values_val.dtype
+
+    @property
+    def default(self) -> Value:
+        return self.default_val
+
+    @property
+    def values(self) -> np.ndarray:
+        """the underlying array (one entry per cell)"""
+        return self.values_val
+
+    @property
+    def sparse(self) -> bool:
+        return False
+
+    def get(self, index: int) -> Value:
+        return self.values_val[index].item()
+
+    def get_many(self, indices: np.ndarray) -> np.ndarray:
+        return self.values_val[indices]
+
+    def has(self, index: int) -> bool:
+        """every cell holds a value in a dense layer"""
+        return True
+
+    def to_dense(self) -> np.ndarray:
+        return self.values_val
+
+    ###########
+    # setters #
+    ###########
+
+    def set(self, index: int, value: Value) -> None:
+        self.values_val[index] = value
+
+    def set_many(self, indices: np.ndarray, values: Union[Value, np.ndarray]) -> None:
+        self.values_val[indices] = values
+
+
+class Sparse_Layer:
+    """typed values for a few cells only, stored in a dictionary keyed by index. every other cell holds the default
+
+    Usage:
+        >>> layer = Sparse_Layer(size=1000000, dtype=np.float64, default=0.0)
+        >>> layer.set(12345, 0.5)
+        >>> layer.get(12345), layer.get(0)
+        (0.5, 0.0)
+        >>> layer.has(0)
+        False
+    """
+    def __init__(self, size: int, dtype=np.int32, default: Value = 0):
+        if default is None and np.dtype(dtype) != np.object_:
+            raise RuntimeError("a sparse layer of type " + str(np.dtype(dtype)) + " requires a typed default")
+
+        self.size_val = size
+        self.dtype_val = np.dtype(dtype)
+        self.default_val = default
+        self.values_val: dict[int, Value] = dict()
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def dtype(self):
+        return self.dtype_val
+
+    @property
+    def default(self) -> Value:
+        return self.default_val
+
+    @property
+    def values(self) -> dict[int, Value]:
+        """the underlying dictionary (index -> value), holding the cells set explicitly"""
+        return self.values_val
+
+    @property
+    def sparse(self) -> bool:
+        return True
+
+    def get(self, index: int) -> Value:
+        return self.values_val.get(index, self.default_val)
+
+    def get_many(self, indices: np.ndarray) -> np.ndarray:
+        return np.array([self.values_val.get(index, self.default_val) for index in np.ravel(indices).tolist()],
+                        dtype=self.dtype_val).reshape(np.shape(indices))
+
+    def has(self, index: int) -> bool:
+        return index in self.values_val
+
+    def to_dense(self) -> np.ndarray:
+        """materialize the layer as one array (one entry per cell)"""
+        dense = np.full(self.size_val, self.default_val, dtype=self.dtype_val)
+        if len(self.values_val) > 0:
+            dense[np.fromiter(self.values_val.keys(), dtype=np.int64)] = list(self.values_val.values())
+
+        return dense
+
+    ###########
+    # setters #
+    ###########
+
+    def set(self, index: int, value: Value) -> None:
+        self.values_val[index] = self.dtype_val.type(value).item()  # store the value converted to the layer type
+
+    def set_many(self, indices: np.ndarray, values: Union[Value, np.ndarray]) -> None:
+        indices = np.ravel(indices)
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype_val), indices.shape)
+        self.values_val.update(zip(indices.tolist(), values.tolist()))
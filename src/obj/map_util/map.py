@@ -3,11 +3,32 @@
 
 from src.obj.map_util.coord import Coord
 from src.obj.map_util.map_cell import Map_Cell
+from src.obj.map_util.layer import Dense_Layer, Sparse_Layer, Value
 from math import sqrt
+from typing import Optional, Tuple, Union
+import numpy as np
+
+Layer = Union[Dense_Layer, Sparse_Layer]
+
+# (direction, dx, dy) of the neighbors of a cell. the first 4 entries form the 4-connected neighborhood, and the
+# order determines the order of the neighbors returned by the map (which the planners rely on for tie-breaking)
+NEIGHBOR_DIRECTIONS: list[Tuple[str, int, int]] = [
+    ("north", 0, -1),
+    ("south", 0, 1),
+    ("east", 1, 0),
+    ("west", -1, 0),
+    ("northeast", 1, -1),
+    ("southeast", 1, 1),
+    ("southwest", -1, 1),
+    ("northwest", -1, -1)
+]
 
 
 class Map:
-    """encapsulate the map information. represented by a 1D array holding Map_Cell objects
+    """encapsulate the map information. represented by a dense, flattened 1D index space, where the coordinate of each
+    cell is implicit in its index (index = width * y + x). per-attribute data are stored in named, typed layers (one
+    numpy array, or one sparse dictionary, per attribute), and Map_Cell objects are only created lazily, when a caller
+    asks for one. Map_Cell attributes are views into the layers
 
     Usage:
         >>> m = Map(5, 10)
@@ -15,17 +36,30 @@ class Map:
         5
         >>> m.height
         10
+        >>> m.index(Coord(2, 1))
+        7
+        >>> m.map_cell_at(7).x, m.map_cell_at(7).y
+        (2, 1)
+        >>> m.map_cell(Coord(2, 1)) is m.map_cell_at(7)
+        True
     """
     def __init__(self, width, height):
         self.width_val = width
         self.height_val = height
-        self.map_array_val = list()
 
-        # flattens the 2D array to 1D, from left to right (increment x_cor, then increment y_cor)
-        for y in range(height):
-            for x in range(width):
-                new_map_cell = Map_Cell(Coord(x, y))
-                self.map_array_val.append(new_map_cell)
+        # named, typed per-attribute layers, indexed by flattened index
+        self.layers_val: dict[str, Layer] = dict()
+
+        # incremented on every attribute change made through the map (or its map cells), lets caches (e.g. planned
+        # paths) detect that they are outdated
+        self.version_val = 0
+
+        # lazily created Map_Cell views, keyed by flattened index. the same view is handed out on every request,
+        # so identity comparisons between map cells (e.g. in Drone.loc) keep working
+        self._map_cells: dict[int, Map_Cell] = dict()
+
+        # precomputed neighbor index tables, keyed by connectivity (4 or 8), built on first use
+        self._neighbor_tables: dict[int, np.ndarray] = dict()
 
     #######################
     # getters and setters #
@@ -48,12 +82,28 @@ class Map:
         self.height_val = height
 
     @property
-    def map_array(self):
-        return self.map_array_val
+    def map_array(self) -> list[Map_Cell]:
+        """materialize every map cell (flattened from left to right, then top to bottom). expensive on large maps"""
+        return [self.map_cell_at(index) for index in range(self.size)]
 
     @map_array.setter
     def map_array(self, map_array: list):
-        self.map_array_val = map_array
+        if len(map_array) != self.size:
+            raise RuntimeError("map array size inconsistent with map dimension")
+        self._map_cells = dict(enumerate(map_array))
+
+    @property
+    def layers(self) -> dict[str, Layer]:
+        return self.layers_val
+
+    @property
+    def version(self) -> int:
+        return self.version_val
+
+    @property
+    def size(self) -> int:
+        """total number of cells on the map"""
+        return self.width_val * self.height_val
 
     @property
     def diagonal_length(self) -> float:
@@ -66,70 +116,203 @@ class Map:
             raise RuntimeError("index out of bound, unable to obtain map cell")
 
         # convert 2D array index to flattened 1D array index
-        converted_index = (self.width * coord.y) + coord.x
-        return self.map_array_val[converted_index]
+        return self.map_cell_at(self.index(coord))
+
+    def map_cell_at(self, index: int) -> Map_Cell:
+        """obtain the map cell at the flattened index, creating the Map_Cell view on first access"""
+        map_cell = self._map_cells.get(index)
+
+        if map_cell is None:
+            if not 0 <= index < self.size:
+                raise RuntimeError("index out of bound, unable to obtain map cell")
+
+            map_cell = Map_Cell(self.coord(index), map=self)
+            self._map_cells[index] = map_cell
+
+        return map_cell
 
     def check_bound(self, coord: Coord):
         """check whether the coord is within the map boundaries"""
         return (0 <= coord.x < self.width) and (0 <= coord.y < self.height)
 
-    def neighbor(self, map_cell: Map_Cell) -> list[Map_Cell]:
-        # TODO: implement in neighbor the algorithm, append "north" "south" labels in the def neighbor_dict(map_cell):
+    def index(self, coord: Coord) -> int:
+        """convert the 2D coordinate to the flattened 1D index (no bound check)"""
+        return (self.width_val * coord.y) + coord.x
+
+    def coord(self, index: int) -> Coord:
+        """convert the flattened 1D index back to the 2D coordinate"""
+        y, x = divmod(index, self.width_val)
+        return Coord(x, y)
+
+    def indices_to_xy(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """vectorized conversion of flattened indices to (x coordinates, y coordinates)"""
+        y, x = np.divmod(indices, self.width_val)
+        return x, y
+
+    ####################
+    # attribute layers #
+    ####################
+
+    def add_layer(self, key: str, dtype=np.int32, default: Value = 0, sparse: bool = False) -> Layer:
+        """allocate a named, typed attribute layer, every cell initially holds default
+
+        @:param sparse: store only the explicitly set cells (in a dictionary) rather than one array entry per cell
+        """
+        if key in self.layers_val:
+            raise RuntimeError("layer \"" + key + "\" already exists")
+
+        layer_type = Sparse_Layer if sparse else Dense_Layer
+        layer = layer_type(size=self.size, dtype=dtype, default=default)
+        self.layers_val[key] = layer
+        self.version_val += 1
+        return layer
+
+    def layer(self, key: str) -> Layer:
+        """obtain the attribute layer associated with the attribute key"""
+        if key not in self.layers_val:
+            raise RuntimeError("layer \"" + key + "\" does not exist")
+
+        return self.layers_val[key]
+
+    def has_layer(self, key: str) -> bool:
+        return key in self.layers_val
+
+    def remove_layer(self, key: str) -> None:
+        self.layer(key)  # ensure the layer exists
+        del self.layers_val[key]
+        self.version_val += 1
+
+    def add_column(self, key: str, dtype=np.int32, default: Value = 0) -> np.ndarray:
+        """allocate a dense layer, return its typed column (one value per cell)"""
+        return self.add_layer(key, dtype=dtype, default=default).values
+
+    def column(self, key: str) -> np.ndarray:
+        """obtain the typed column (one value per cell) associated with the attribute key. note that writing to the
+        column of a dense layer directly does not update the map version"""
+        return self.layer(key).to_dense()
+
+    def has_column(self, key: str) -> bool:
+        return self.has_layer(key)
+
+    def get_attribute(self, key: str, index: int) -> Optional[Value]:
+        """get the attribute of the cell at the flattened index, return None if the layer doesn't exist"""
+        layer = self.layers_val.get(key)
+        return layer.get(index) if layer is not None else None
+
+    def set_attribute(self, key: str, index: int, value: Value) -> None:
+        """set the attribute of the cell at the flattened index, a sparse layer typed after the value (defaulting to
+        the zero of the type, False for booleans) is created when the layer doesn't exist"""
+        if key not in self.layers_val:
+            dtype = np.asarray(value).dtype
+            self.add_layer(key, dtype=dtype, default=np.zeros((), dtype=dtype).item(), sparse=True)
+
+        self.layers_val[key].set(index, value)
+        self.version_val += 1
+
+    def region_indices(self, x_begin: int, y_begin: int, x_end: int, y_end: int) -> np.ndarray:
+        """flattened indices of the rectangular region [x_begin, x_end) x [y_begin, y_end), shape (rows, columns)"""
+        x = np.arange(max(x_begin, 0), min(x_end, self.width_val))
+        y = np.arange(max(y_begin, 0), min(y_end, self.height_val))
+        return np.add.outer(y * self.width_val, x)
+
+    def get_region(self, key: str, x_begin: int, y_begin: int, x_end: int, y_end: int) -> np.ndarray:
+        """bulk get the attribute of the region [x_begin, x_end) x [y_begin, y_end), shape (rows, columns)"""
+        return self.layer(key).get_many(self.region_indices(x_begin, y_begin, x_end, y_end))
+
+    def set_region(self, key: str, x_begin: int, y_begin: int, x_end: int, y_end: int,
+                   value: Union[Value, np.ndarray]) -> None:
+        """bulk set the attribute of the region [x_begin, x_end) x [y_begin, y_end)"""
+        self.layer(key).set_many(self.region_indices(x_begin, y_begin, x_end, y_end), value)
+        self.version_val += 1
+
+    def get_mask(self, key: str, mask: np.ndarray) -> np.ndarray:
+        """bulk get the attribute of the cells selected by the boolean mask, shaped (height, width) or (size,)"""
+        return self.layer(key).get_many(np.flatnonzero(mask))
+
+    def set_mask(self, key: str, mask: np.ndarray, value: Union[Value, np.ndarray]) -> None:
+        """bulk set the attribute of the cells selected by the boolean mask, shaped (height, width) or (size,)"""
+        self.layer(key).set_many(np.flatnonzero(mask), value)
+        self.version_val += 1
+
+    ####################
+    # neighbor lookups #
+    ####################
+
+    def neighbor_table(self, connectivity: int = 8) -> np.ndarray:
+        """obtain the precomputed (size, connectivity) neighbor index table, with -1 marking out-of-bound neighbors
+
+        columns follow the direction order of NEIGHBOR_DIRECTIONS (the first 4 are the 4-connected neighbors). the
+        table is built once, on first request, and reused afterwards
+        """
+        table = self._neighbor_tables.get(connectivity)
+
+        if table is None:
+            if connectivity not in (4, 8):
+                raise RuntimeError("unsupported connectivity " + str(connectivity) + ", expecting 4 or 8")
+
+            index_dtype = np.int32 if self.size < 2 ** 31 else np.int64
+            indices = np.arange(self.size, dtype=index_dtype)
+            x, y = self.indices_to_xy(indices)
+
+            table = np.empty((self.size, connectivity), dtype=index_dtype)
+            for column, (_, dx, dy) in enumerate(NEIGHBOR_DIRECTIONS[:connectivity]):
+                in_bound = (0 <= x + dx) & (x + dx < self.width_val) & (0 <= y + dy) & (y + dy < self.height_val)
+                table[:, column] = np.where(in_bound, indices + (dy * self.width_val + dx), -1)
+
+            self._neighbor_tables[connectivity] = table
+
+        return table
+
+    def neighbor_indices(self, index: int, connectivity: int = 8) -> np.ndarray:
+        """obtain the flattened indices of the in-bound neighbors of the cell at index"""
+        row = self.neighbor_table(connectivity)[index]
+        return row[row >= 0]
+
+    def neighbor(self, map_cell: Map_Cell, connectivity: int = 8) -> list[Map_Cell]:
         """obtain a list of neighbor map_cells"""
-        return list(self.find_neighbors_8(map_cell).values())
+        row = self.neighbor_table(connectivity)[self.index(map_cell)].tolist()
+        return [self.map_cell_at(index) for index in row if index >= 0]
 
     def find_neighbors_8(self, map_cell: Map_Cell) -> dict[str, Map_Cell]:
-        neighbor_dict = dict()
-
-        x_cor = map_cell.x
-        y_cor = map_cell.y
+        """obtain the 8-connected neighbor map_cells, keyed by direction ("north", "northeast", ...)"""
+        return self._find_neighbors(map_cell, 8)
 
-        new_x_cor = x_cor
-        new_y_cor = y_cor - 1
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["north"] = self.map_cell(Coord(new_x_cor, new_y_cor))
+    def find_neighbors_4(self, map_cell: Map_Cell) -> dict[str, Map_Cell]:
+        """obtain the 4-connected neighbor map_cells, keyed by direction ("north", "south", "east", "west")"""
+        return self._find_neighbors(map_cell, 4)
 
-        new_x_cor = x_cor
-        new_y_cor = y_cor + 1
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["south"] = self.map_cell(Coord(new_x_cor, new_y_cor))
+    def _find_neighbors(self, map_cell: Map_Cell, connectivity: int) -> dict[str, Map_Cell]:
+        row = self.neighbor_table(connectivity)[self.index(map_cell)].tolist()
 
-        new_x_cor = x_cor + 1
-        new_y_cor = y_cor
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["east"] = self.map_cell(Coord(new_x_cor, new_y_cor))
+        return {direction: self.map_cell_at(index)
+                for (direction, _, _), index in zip(NEIGHBOR_DIRECTIONS, row) if index >= 0}
 
-        new_x_cor = x_cor - 1
-        new_y_cor = y_cor
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["west"] = self.map_cell(Coord(new_x_cor, new_y_cor))
+    ###################
+    # move validation #
+    ###################
 
-        new_x_cor = x_cor + 1
-        new_y_cor = y_cor - 1
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["northeast"] = self.map_cell(Coord(new_x_cor, new_y_cor))
+    def valid_move(self, curr: Union[Coord, Map_Cell], dest: Union[Coord, Map_Cell]) -> bool:
+        """check whether dest is reachable from curr in one step (the cell itself or one of its 8 neighbors), i.e.
+        chebyshev distance <= 1 and dest within the map boundaries"""
+        return abs(dest.x - curr.x) <= 1 and abs(dest.y - curr.y) <= 1 and self.check_bound(dest)
 
-        new_x_cor = x_cor + 1
-        new_y_cor = y_cor + 1
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["southeast"] = self.map_cell(Coord(new_x_cor, new_y_cor))
+    def valid_moves(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """vectorized valid_move over a whole trajectory given as coordinate arrays of length n
 
-        new_x_cor = x_cor - 1
-        new_y_cor = y_cor + 1
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["southwest"] = self.map_cell(Coord(new_x_cor, new_y_cor))
+        return the (n - 1,) boolean array, whether each step (sample i to sample i + 1) is a valid move
+        """
+        x = np.asarray(x, dtype=np.int64)
+        y = np.asarray(y, dtype=np.int64)
 
-        new_x_cor = x_cor - 1
-        new_y_cor = y_cor - 1
-        if self.check_bound(Coord(new_x_cor, new_y_cor)):
-            neighbor_dict["northwest"] = self.map_cell(Coord(new_x_cor, new_y_cor))
-
-        return neighbor_dict
+        in_bound = (0 <= x[1:]) & (x[1:] < self.width_val) & (0 <= y[1:]) & (y[1:] < self.height_val)
+        return (np.abs(np.diff(x)) <= 1) & (np.abs(np.diff(y)) <= 1) & in_bound
 
     def print_map_array(self):
         """visualize the internal maps (containing x and y coordinate and the output value)"""
 
-        for index, map_cell in enumerate(self.map_array_val):
+        for index in range(self.size):
+            map_cell = self.map_cell_at(index)
+
             if index % self.width == 0:
                 print("height = " + str(map_cell.y))
 
@@ -2,11 +2,16 @@
 # Mon Jan 18 12:02:13 EST 2021
 
 from src.obj.map_util.coord import Coord
-from typing import Union, Optional
+from typing import TYPE_CHECKING, Union, Optional
+
+if TYPE_CHECKING:  # the map imports the cells, only annotations refer to it
+    from src.obj.map_util.map import Map
 
 
 class Map_Cell:
-    """
+    """a cell of the map. cells handed out by a Map are views: their attributes are read from and written to the
+    attribute layers of the map, rather than a dictionary per cell. standalone cells keep their own dictionary
+
     Usage:
         >>> mc = Map_Cell(Coord(0, 1))
         >>> mc.x
@@ -19,9 +24,14 @@ class Map_Cell:
         >>> mc.has_attribute("visited")
         True
     """
-    def __init__(self, coord: Coord, attributes: Optional[dict[str, Union[int, float, bool]]] = None):
+    def __init__(self, coord: Coord, attributes: Optional[dict[str, Union[int, float, bool]]] = None,
+                 map: Optional['Map'] = None):
         self.coord_val = coord
-        self.attributes_val = attributes
+        self.map_val = map  # the map holding the attribute layers, None for standalone cells
+        self.attributes_val = None
+
+        if attributes is not None:
+            self.attributes = attributes
 
     #######################
     # getters and setters #
@@ -35,12 +45,33 @@ class Map_Cell:
         self.coord_val = coord
 
     @property
-    def attributes(self):
-        return self.attributes_val
+    def map(self) -> Optional['Map']:
+        return self.map_val
+
+    @property
+    def index(self) -> int:
+        """flattened index of the cell in its map"""
+        return self.map_val.index(self.coord_val)
+
+    @property
+    def attributes(self) -> dict[str, Union[int, float, bool]]:
+        """the attributes held by the cell (a snapshot for map cells, collected from the layers of the map)"""
+        if self.map_val is None:
+            if self.attributes_val is None:
+                self.attributes_val = dict()
+
+            return self.attributes_val
+
+        index = self.index
+        return {key: layer.get(index) for key, layer in self.map_val.layers.items() if layer.has(index)}
 
     @attributes.setter
     def attributes(self, attributes: dict[str, Union[int, float, bool]]):
-        self.attributes_val = attributes
+        if self.map_val is None:
+            self.attributes_val = attributes
+        else:
+            for key, value in attributes.items():
+                self.set_attribute(key, value)
 
     @property
     def x(self):
@@ -48,7 +79,7 @@ class Map_Cell:
 
     @x.setter
     def x(self, x):
-        self.coord_val.x = x
+        self.coord_val = Coord(x, self.coord_val.y)  # Coord is immutable
 
     @property
     def y(self) -> int:
@@ -56,20 +87,28 @@ class Map_Cell:
 
     @y.setter
     def y(self, y):
-        self.coord_val.y = y
+        self.coord_val = Coord(self.coord_val.x, y)  # Coord is immutable
 
     def set_attribute(self, key: str, value: Union[int, float, bool]):
-        self.attributes[key] = value
+        if self.map_val is None:
+            self.attributes[key] = value
+        else:
+            self.map_val.set_attribute(key, self.index, value)
 
     def get_attribute(self, key: str) -> Optional[Union[int, float, bool]]:
         """get attribute via key, return None if attribute doesn't exist"""
-        if self.has_attribute(key):
+        if self.map_val is not None:
+            return self.map_val.get_attribute(key, self.index) if self.has_attribute(key) else None
+        elif self.has_attribute(key):
             return self.attributes[key]
         else:
             return None
 
     def has_attribute(self, key) -> bool:
-        """check if an attribute exists in the dictionary"""
+        """check if an attribute exists in the dictionary (or the layer of the map holds a value for the cell)"""
+        if self.map_val is not None:
+            return self.map_val.has_layer(key) and self.map_val.layer(key).has(self.index)
+
         return key in self.attributes.keys()
 
     def distance_to(self, other: 'Map_Cell') -> float:
@@ -0,0 +1,184 @@
+# uniform-grid spatial index of drone locations over a map, for nearest-drone and proximity queries
+
+from src.obj.map_util.map import Map
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+
+DEFAULT_BUCKET_SIZE = 8  # width (and height) of the square buckets, in cells
+
+
+class Proximity_Report(NamedTuple):
+    """pairs of drones (i < j) closer than the collision / near-miss radius at a given step"""
+    collisions: list[Tuple[int, int]]
+    near_misses: list[Tuple[int, int]]
+
+
+class Spatial_Index:
+    """bucket the drones into square buckets of bucket_size x bucket_size cells, so that proximity queries only visit
+    the buckets around the query location instead of every drone. the index is updated incrementally: a drone only
+    changes bucket when it crosses a bucket boundary
+
+    Usage:
+        >>> from src.obj.map import Map
+        >>> index = Spatial_Index(Map(100, 100), bucket_size=8)
+        >>> index.update_all(np.array([0, 1, 50, 99]), np.array([0, 1, 50, 99]))
+        >>> index.within_radius(0, 0, 2)
+        [0, 1]
+        >>> index.k_nearest(60, 60, 2)
+        [2, 3]
+        >>> index.proximity_report(collision_radius=0, near_miss_radius=1.5).near_misses
+        [(0, 1)]
+    """
+    def __init__(self, map: Map, bucket_size: int = DEFAULT_BUCKET_SIZE):
+        self.map_val = map
+        self.bucket_size_val = bucket_size
+
+        self._buckets: dict[Tuple[int, int], set[int]] = dict()  # bucket -> drones in the bucket
+        self._x = np.zeros(0, dtype=np.int64)  # x coordinate of every drone
+        self._y = np.zeros(0, dtype=np.int64)  # y coordinate of every drone
+        self._present = np.zeros(0, dtype=np.bool_)  # whether the drone is in the index
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def map(self) -> Map:
+        return self.map_val
+
+    @property
+    def bucket_size(self) -> int:
+        return self.bucket_size_val
+
+    def __len__(self):
+        return int(self._present.sum())
+
+    def bucket(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.bucket_size_val, y // self.bucket_size_val
+
+    ###########
+    # updates #
+    ###########
+
+    def _reserve(self, size: int) -> None:
+        """grow the per-drone arrays to hold at least size drones"""
+        if size > len(self._present):
+            grow = size - len(self._present)
+            self._x = np.concatenate((self._x, np.zeros(grow, dtype=np.int64)))
+            self._y = np.concatenate((self._y, np.zeros(grow, dtype=np.int64)))
+            self._present = np.concatenate((self._present, np.zeros(grow, dtype=np.bool_)))
+
+    def update(self, drone: int, x: int, y: int) -> None:
+        """insert the drone, or move it to (x, y)"""
+        self._reserve(drone + 1)
+        new_bucket = self.bucket(x, y)
+
+        if self._present[drone]:
+            old_bucket = self.bucket(int(self._x[drone]), int(self._y[drone]))
+            if old_bucket == new_bucket:  # same bucket, only the location changes
+                self._x[drone], self._y[drone] = x, y
+                return
+
+            self._buckets[old_bucket].discard(drone)
+
+        self._buckets.setdefault(new_bucket, set()).add(drone)
+        self._x[drone], self._y[drone], self._present[drone] = x, y, True
+
+    def update_all(self, x: np.ndarray, y: np.ndarray) -> None:
+        """move drones 0..N-1 to the given (N,) coordinates, only the drones crossing a bucket boundary (or new to the
+        index) are re-bucketed"""
+        self._reserve(len(x))
+        x = np.asarray(x, dtype=np.int64)
+        y = np.asarray(y, dtype=np.int64)
+        drones = np.arange(len(x))
+
+        moved = ~self._present[drones] | (x // self.bucket_size_val != self._x[drones] // self.bucket_size_val) | \
+            (y // self.bucket_size_val != self._y[drones] // self.bucket_size_val)
+
+        for drone in np.flatnonzero(moved).tolist():
+            self.update(drone, int(x[drone]), int(y[drone]))
+
+        self._x[drones], self._y[drones] = x, y
+
+    def remove(self, drone: int) -> None:
+        if drone < len(self._present) and self._present[drone]:
+            self._buckets[self.bucket(int(self._x[drone]), int(self._y[drone]))].discard(drone)
+            self._present[drone] = False
+
+    ###########
+    # queries #
+    ###########
+
+    def _candidates(self, bucket_x_range: range, bucket_y_range: range) -> np.ndarray:
+        """drones in the buckets of the given ranges"""
+        candidates = list()
+        for bucket_y in bucket_y_range:
+            for bucket_x in bucket_x_range:
+                candidates.extend(self._buckets.get((bucket_x, bucket_y), ()))
+
+        return np.array(candidates, dtype=np.int64)
+
+    def _distance(self, drones: np.ndarray, x: int, y: int) -> np.ndarray:
+        return np.sqrt((self._x[drones] - x) ** 2 + (self._y[drones] - y) ** 2)
+
+    def within_radius(self, x: int, y: int, radius: float, exclude: Optional[int] = None) -> list[int]:
+        """drones within the (euclidean) radius of (x, y), sorted by drone number"""
+        low_x, low_y = self.bucket(int(np.floor(x - radius)), int(np.floor(y - radius)))
+        high_x, high_y = self.bucket(int(np.ceil(x + radius)), int(np.ceil(y + radius)))
+
+        candidates = self._candidates(range(low_x, high_x + 1), range(low_y, high_y + 1))
+        drones = candidates[self._distance(candidates, x, y) <= radius]
+
+        return sorted(drone for drone in drones.tolist() if drone != exclude)
+
+    def k_nearest(self, x: int, y: int, k: int, exclude: Optional[int] = None) -> list[int]:
+        """the k drones nearest to (x, y), sorted by distance (then drone number)
+
+        rings of buckets around the query bucket are visited outward, until the k-th nearest drone found is closer
+        than any drone the next ring could hold
+        """
+        if k <= 0:
+            return list()
+
+        center_x, center_y = self.bucket(x, y)
+        max_ring = max(self.map_val.width, self.map_val.height) // self.bucket_size_val + 1
+        found = np.zeros(0, dtype=np.int64)
+
+        for ring in range(max_ring + 1):
+            if ring == 0:
+                candidates = self._candidates(range(center_x, center_x + 1), range(center_y, center_y + 1))
+            else:
+                # the border of the (2 * ring + 1) x (2 * ring + 1) square of buckets
+                bucket_x_range = range(center_x - ring, center_x + ring + 1)
+                candidates = np.concatenate((
+                    self._candidates(bucket_x_range, range(center_y - ring, center_y - ring + 1)),
+                    self._candidates(bucket_x_range, range(center_y + ring, center_y + ring + 1)),
+                    self._candidates(range(center_x - ring, center_x - ring + 1), range(center_y - ring + 1, center_y + ring)),
+                    self._candidates(range(center_x + ring, center_x + ring + 1), range(center_y - ring + 1, center_y + ring))
+                ))
+
+            if exclude is not None:
+                candidates = candidates[candidates != exclude]
+            found = np.concatenate((found, candidates))
+
+            # drones beyond this ring are at least ring * bucket_size away from the query
+            if len(found) >= k and np.sort(self._distance(found, x, y))[k - 1] <= ring * self.bucket_size_val:
+                break
+
+        order = np.lexsort((found, self._distance(found, x, y)))
+        return found[order][:k].tolist()
+
+    def proximity_report(self, collision_radius: float = 0, near_miss_radius: float = 1.5) -> Proximity_Report:
+        """pairs of drones (i < j) within the collision radius, and pairs beyond it but within the near-miss radius"""
+        collisions: list[Tuple[int, int]] = list()
+        near_misses: list[Tuple[int, int]] = list()
+
+        for drone in np.flatnonzero(self._present).tolist():
+            x, y = int(self._x[drone]), int(self._y[drone])
+
+            for other in self.within_radius(x, y, near_miss_radius):
+                if other > drone:
+                    distance = np.hypot(x - self._x[other], y - self._y[other])
+                    (collisions if distance <= collision_radius else near_misses).append((drone, other))
+
+        return Proximity_Report(collisions=collisions, near_misses=near_misses)
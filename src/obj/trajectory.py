@@ -0,0 +1,129 @@
+# columnar storage of drone trajectories, converted to STL-API signals only when needed
+
+from stl.api import Signal
+from typing import Optional
+import numpy as np
+
+DEFAULT_FIELDS = ("x", "y")
+DEFAULT_CAPACITY = 16  # initial number of samples preallocated by a trajectory
+
+
+class Trajectory:
+    """preallocated, growable columnar trajectory. each field (x, y, ...) is stored as an int array, the capacity is
+    doubled whenever the trajectory runs out of room
+
+    Usage:
+        >>> t = Trajectory()
+        >>> t.append(1, 2)
+        >>> t.append(2, 3)
+        >>> len(t)
+        2
+        >>> t.column("x").tolist()
+        [1, 2]
+        >>> t.get(1, 1).lookup("y")
+        [3]
+
+    Attributes:
+        self.fields_val: names of the fields, in column order
+        self._buffer: (number of fields, capacity) array, holding the samples in its first self._length columns
+        self._signal: cached STL-API signal conversion, reset on append
+    """
+    def __init__(self, fields: tuple[str, ...] = DEFAULT_FIELDS, capacity: int = DEFAULT_CAPACITY, dtype=np.int32):
+        self.fields_val = tuple(fields)
+        self._buffer: np.ndarray = np.empty((len(self.fields_val), max(capacity, 1)), dtype=dtype)
+        self._length = 0
+        self._signal: Optional[Signal] = None
+
+    @classmethod
+    def from_columns(cls, columns: np.ndarray, fields: tuple[str, ...] = DEFAULT_FIELDS) -> 'Trajectory':
+        """wrap a (number of fields, length) array as a trajectory, without copying it"""
+        trajectory = cls.__new__(cls)
+        trajectory.fields_val = tuple(fields)
+        trajectory._buffer = columns
+        trajectory._length = columns.shape[1]
+        trajectory._signal = None
+
+        if columns.shape[0] != len(trajectory.fields_val):
+            raise RuntimeError("number of columns inconsistent with the number of fields")
+
+        return trajectory
+
+    @classmethod
+    def from_signal(cls, signal: Signal, fields: tuple[str, ...] = DEFAULT_FIELDS) -> 'Trajectory':
+        """convert an STL-API signal to a trajectory"""
+        return cls.from_columns(np.array([signal.lookup(field) for field in fields], dtype=np.int32).reshape(
+            len(fields), len(signal)), fields=fields)
+
+    ###########
+    # getters #
+    ###########
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        return self.fields_val
+
+    @property
+    def columns(self) -> np.ndarray:
+        """(number of fields, length) view of the samples"""
+        return self._buffer[:, :self._length]
+
+    def column(self, field: str) -> np.ndarray:
+        """zero-copy view of the samples of the field"""
+        return self._buffer[self.fields_val.index(field), :self._length]
+
+    def lookup(self, field: str) -> list[int]:
+        """samples of the field as a list (same as Signal.lookup)"""
+        return self.column(field).tolist()
+
+    def get(self, begin: int, end: int) -> 'Trajectory':
+        """zero-copy slice of the trajectory from begin to end, both inclusive (same as Signal.get)"""
+        return Trajectory.from_columns(self._buffer[:, begin:min(end + 1, self._length)], fields=self.fields_val)
+
+    def __len__(self):
+        return self._length
+
+    ###########
+    # setters #
+    ###########
+
+    def append(self, *values: int) -> None:
+        """append one sample, values are given in field order"""
+        if self._length == self._buffer.shape[1]:
+            self._grow(self._length + 1)
+
+        self._buffer[:, self._length] = values
+        self._length += 1
+        self._signal = None
+
+    def extend(self, columns: np.ndarray) -> None:
+        """append a (number of fields, k) block of samples"""
+        new_length = self._length + columns.shape[1]
+        if new_length > self._buffer.shape[1]:
+            self._grow(new_length)
+
+        self._buffer[:, self._length:new_length] = columns
+        self._length = new_length
+        self._signal = None
+
+    def _grow(self, min_capacity: int) -> None:
+        """reallocate the buffer with (at least) doubled capacity"""
+        new_buffer = np.empty((self._buffer.shape[0], max(min_capacity, 2 * self._buffer.shape[1])),
+                              dtype=self._buffer.dtype)
+        new_buffer[:, :self._length] = self._buffer[:, :self._length]
+        self._buffer = new_buffer
+
+    ##############
+    # conversion #
+    ##############
+
+    def to_signal(self) -> Signal:
+        """convert the trajectory to an STL-API signal (cached until the next append)"""
+        if self._signal is None:
+            self._signal = Signal()
+            for sample in zip(*self.columns.tolist()):
+                self._signal.append(py_dict=dict(zip(self.fields_val, sample)))
+
+        return self._signal
+
+    def __str__(self):
+        return "Trajectory: " + str([dict(zip(self.fields_val, sample)) for sample in zip(*self.columns.tolist())])
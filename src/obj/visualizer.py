@@ -4,12 +4,32 @@
 # issue: when running 2 visualizers, the matploblib cache/plot configuration may not be cleared
 
 from stl.api import Signal
+from src.obj.trajectory import Trajectory
 from typing import Tuple, Union, Optional
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+from multiprocessing import Pool
+import os
 import numpy as np
 
 ANIMATION_REFRESH_INTERVAL = 2000  # time between the animation is refreshed
+STYLE = 'fivethirtyeight'  # use style excerpted from fivethirtyeight.com
+FIGURE_SIZE = (13, 13)  # figure size (inches)
+EXPORT_DPI = 72  # default resolution of the exported frames
+FRAME_FILE_NAME = "frame_%05d.png"  # file name of the exported frames, formatted with the step
+
+
+def _pyplot():
+    """import matplotlib.pyplot on first use, so that importing the visualizer (e.g. from the mission code) does not
+    pay for matplotlib until rendering is actually requested"""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _export_frames(job: tuple) -> None:
+    """render a contiguous range of frames to a directory, run by each worker process during the export"""
+    signal_data, width, height, messages, directory, begin, end, dpi = job
+
+    visual = Visualizer(signal_data=signal_data, width=width, height=height, messages=messages)
+    visual.render_frames(directory=directory, begin=begin, end=end, dpi=dpi)
 
 
 class Visualizer:
@@ -34,6 +54,7 @@ class Visualizer:
 
     Note that the signal uses x and y to represent the coordinate system
     signal_data_val: [(id_1: str, exe_signal_1: Signal, pred_signals_1: list[Signal]), (id_2, exe_signal_2: Signal, pred_signals_2: list[Signal]), ...]
+    Trajectory objects (columnar x and y) may be used in place of Signal objects, and are read without copying
     """
 
     def __init__(self, signal_data: list[Tuple[str, Signal, list[Signal]]] = list(),
@@ -50,6 +71,10 @@ class Visualizer:
         self.messages_val = messages
         self._counter = 0  # initialize the counter to 0, count the steps into the animation
         self._counter_print = True
+        self._ax = None  # the axis the signals are drawn on, set by init
+        self._text = None  # the message textbox, set by init
+        self._exe_coords = list()  # precomputed coordinates of the execution signals, set by init
+        self._pred_coords = list()  # precomputed coordinates of the predictive signals, set by init
 
     def append(self, id_val: str, exe_signal: Signal, pred_signals: list[Signal]) -> None:
         """append (execution signal, predictive signal) pairs to the signal data
@@ -104,50 +129,83 @@ class Visualizer:
         """predicted signal lists"""
         return list(map(lambda tuple_val: tuple_val[2], self.signal_data_val))
 
-    def init(self) -> None:
-        plt.style.use('fivethirtyeight')  # use style excerpted from fivethirtyeight.com
+    def init(self, ax=None) -> None:
+        """initialize the axis, default to the current axis of pyplot (live animation)"""
+        if ax is None:
+            plt = _pyplot()
+            plt.style.use(STYLE)
+            ax = plt.gca()  # get and set current axis instances
 
-        plt.xticks(np.arange(0, self.width, 1.0))  # set x axis increment to 1
-        plt.yticks(np.arange(0, self.height, 1.0))  # set y axis increment to 1
-        plt.tick_params(axis='both', which='major', labelsize=10, labelbottom=False, bottom=False, top=False,
-                        labeltop=True, length=0)
+        ax.set_xticks(np.arange(0, self.width, 1.0))  # set x axis increment to 1
+        ax.set_yticks(np.arange(0, self.height, 1.0))  # set y axis increment to 1
+        ax.tick_params(axis='both', which='major', labelsize=10, labelbottom=False, bottom=False, top=False,
+                       labeltop=True, length=0)
 
         # ax.lines = [exe_line_1, pred_line_1, exe_line_2, pred_line_2]
 
         for id_val in self.id_list:  # put the id as labels on the graph
-            plt.plot([], [], label=id_val)  # drone exe signal label
-            plt.plot([], [], label=id_val + " Prediction", linestyle="dashed")  # drone pred signal label
+            ax.plot([], [], label=id_val)  # drone exe signal label
+            ax.plot([], [], label=id_val + " Prediction", linestyle="dashed")  # drone pred signal label
 
-        ax = plt.gca()  # get and set current axis instances
         ax.set_xlim(0, self.width)
         ax.set_ylim(self.height, 0)
 
-        plt.legend()  # display the legend
-        plt.tight_layout()  # use tight_layout
+        ax.legend()  # display the legend
+        ax.figure.tight_layout()  # use tight_layout
 
         # the # of lines should be 2x the # of id/labels
         assert len(ax.lines) == 2 * len(self)
 
+        # present message textbox on the upper left corner, a single text artist reused by every frame
+        props = dict(boxstyle='round', facecolor='wheat', alpha=1.0)  # set style of the textbox, alpha for transparency
+        self._text = ax.text(0.05, 0.95, "", transform=ax.transAxes, fontsize=14, verticalalignment='top', bbox=props,
+                             visible=False)
+
+        #####################################################
+        # precompute the coordinate arrays of every signal #
+        #####################################################
+
+        self._exe_coords = list()  # per drone, (x coordinates, y coordinates) of the execution signal
+        self._pred_coords = list()  # per drone, per step, (x coordinates, y coordinates) of the predictive signal
+
+        for exe_signal, pred_signals in zip(self.exe_signal_list, self.pred_signal_lists):
+            if len(exe_signal) != len(pred_signals):
+                raise RuntimeError("length inconsistent between execution signal and predictive signal\nlen("
+                                   "exe_signal)= " + str(len(exe_signal)) + ", len(pred_signal) = " + str(len(
+                    pred_signals)))
+
+            if self.messages is not None:  # ensure message list has the same length as the exe signals
+                assert len(exe_signal) == len(self.messages)
+
+            # linearize signals Signal -> [x_cor_1, x_cor_2, ...], [y_cor_1, y_cor_2, ...] (zero-copy for trajectories)
+            self._exe_coords.append(tuple(map(np.asarray, self.linearize_signal(exe_signal))))
+            self._pred_coords.append([self.linearize_signal(pred_signal) for pred_signal in pred_signals])
+
+        self._ax = ax
+
+    @property
+    def artists(self) -> list:
+        """the artists updated by every frame (the lines and the message textbox), used for blitting"""
+        return self._ax.lines[:2 * len(self)] + [self._text]
+
     # TODO: equivalent to animate_helper
-    def animate(self, _):
+    def animate(self, _) -> list:
+        """draw the frame of the current step, then advance the counter. per-frame cost does not depend on the step,
+        the artists are updated in place (the execution line is a view on the precomputed coordinates)
+        """
         if self._counter_print:
             print("counter: " + str(self._counter))  # debug, printer counter
 
-        ax = plt.gca()
+        ax = self._ax
 
         ############################
         # add message GUI elements #
         ############################
 
         if self.messages is not None and self._counter < len(self.messages):
-            # present message textbox on the upper left corner
             text = "step #" + str(self._counter) + " " + self.messages[self._counter]  # debug
-
-            # alpha value for transparency
-            props = dict(boxstyle='round', facecolor='wheat', alpha=1.0)  # set style of the textbox
-
-            ax.text(0.05, 0.95, text, transform=ax.transAxes, fontsize=14,
-                    verticalalignment='top', bbox=props)
+            self._text.set_text(text)
+            self._text.set_visible(True)
 
         ###############################
         # associate signals with axis #
@@ -157,52 +215,48 @@ class Visualizer:
             exe_line = ax.lines[idx * 2]  # the line for show execution signal of the drone
             pred_line = ax.lines[idx * 2 + 1]  # the line for the predictive signal of the drone
 
-            exe_signal: Signal = self.exe_signal_list[idx]  # the execution signal corresponding to the line
-            pred_signals: list[Signal] = self.pred_signal_lists[
-                idx]  # the predictive signal corresponding to the line
-
-            if len(exe_signal) != len(pred_signals):
-                raise RuntimeError("length inconsistent between execution signal and predictive signal\nlen("
-                                   "exe_signal)= " + str(len(exe_signal)) + ", len(pred_signal) = " + str(len(
-                    pred_signals)))
-
-            if self.messages is not None:  # ensure message list has the same length as the exe signals
-                assert len(exe_signal) == len(self.messages)
+            exe_x, exe_y = self._exe_coords[idx]  # the execution signal corresponding to the line
+            pred_coords = self._pred_coords[idx]  # the predictive signals corresponding to the line
 
-            if self._counter > len(exe_signal):  # stop the counter print
+            if self._counter > len(exe_x):  # stop the counter print
                 self._counter_print = False
 
-            if self._counter < len(exe_signal):  # prevent accessing signal elements that are out of bound
-                curr_exe_signal_begin = 0
-                curr_exe_signal_end = self._counter
-                curr_exe_signal: Signal = exe_signal.get(curr_exe_signal_begin, curr_exe_signal_end)  # slice signals
-                curr_pred_signal: Signal = pred_signals[self._counter]
+            if self._counter < len(exe_x):  # prevent accessing signal elements that are out of bound
+                exe_line.set_data(exe_x[:self._counter + 1], exe_y[:self._counter + 1])  # slice signals
+                pred_line.set_data(*pred_coords[self._counter])
 
-                # linearize signals Signal -> [x_cor_1, x_cor_2, ...], [y_cor_1, y_cor_2, ...]
-                linearized_curr_exe_signal_x, linearized_curr_exe_signal_y = self.linearize_signal(curr_exe_signal)
-                linearized_curr_pred_signal_x, linearized_curr_pred_signal_y = self.linearize_signal(curr_pred_signal)
-
-                exe_line.set_data(linearized_curr_exe_signal_x, linearized_curr_exe_signal_y)
-                pred_line.set_data(linearized_curr_pred_signal_x, linearized_curr_pred_signal_y)
+        self._counter += 1
+        return self.artists
 
-                # print(linearized_curr_exe_signal_x)
-                # print(linearized_curr_exe_signal_y)
-                # print(linearized_curr_pred_signal_x)
-                # print(linearized_curr_pred_signal_y)
+    def draw(self, step: int) -> list:
+        """draw the frame of the given step"""
+        self._counter = step
+        return self.animate(None)
 
-        self._counter += 1
+    @property
+    def frame_count(self) -> int:
+        """number of frames (steps) to render"""
+        return max((len(exe_signal) for exe_signal in self.exe_signal_list), default=0)
 
     @staticmethod
-    def linearize_signal(signal: Signal) -> Tuple[list[int], list[int]]:
-        # TODO: function to linearized given signal to tuple of x coordinates and y coordinates
+    def linearize_signal(signal: Union[Signal, Trajectory]) -> Tuple[Union[list[int], np.ndarray],
+                                                                     Union[list[int], np.ndarray]]:
+        """linearize the signal to tuple of x coordinates and y coordinates (zero-copy views for trajectories)"""
+        if isinstance(signal, Trajectory):
+            return signal.column("x"), signal.column("y")
+
         return signal.lookup("x"), signal.lookup("y")
 
     def start_animation(self):
         print("starting animation")  # debug
         if self.messages is not None:
             print("message received!")
+        plt = _pyplot()
+        from matplotlib.animation import FuncAnimation
+
         # note that the result of FuncAnimation must be assigned to a variable to initiate the animation
-        animation = FuncAnimation(plt.gcf(), self.animate, interval=ANIMATION_REFRESH_INTERVAL)  # gcf: get curr figure
+        animation = FuncAnimation(plt.gcf(), self.animate, init_func=lambda: self.artists,
+                                  interval=ANIMATION_REFRESH_INTERVAL, blit=True)  # gcf: get curr figure
 
         # set figure size
         fig = plt.gcf()
@@ -213,6 +267,7 @@ class Visualizer:
 
     @staticmethod
     def reset():
+        plt = _pyplot()
         plt.cla()
         plt.clf()
         plt.close()
@@ -221,3 +276,69 @@ class Visualizer:
         self.init()
         self.start_animation()
         self.reset()
+
+    ##########
+    # export #
+    ##########
+
+    @staticmethod
+    def offscreen_figure():
+        """create a figure rendered by the Agg backend, independent of pyplot (no window, usable on headless boxes)"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        figure = Figure(figsize=FIGURE_SIZE)
+        FigureCanvasAgg(figure)
+        return figure
+
+    def render_frames(self, directory: str, begin: int = 0, end: Optional[int] = None, dpi: int = EXPORT_DPI) -> None:
+        """render the frames of the steps [begin, end) to directory/frame_XXXXX.png"""
+        import matplotlib.style
+
+        end = self.frame_count if end is None else end
+        self._counter_print = False
+
+        with matplotlib.style.context(STYLE):
+            figure = self.offscreen_figure()
+            self.init(figure.add_subplot())
+
+            for step in range(begin, end):
+                self.draw(step)
+                figure.savefig(os.path.join(directory, FRAME_FILE_NAME % step), dpi=dpi)
+
+    def export(self, path: str, fps: int = 4, dpi: int = EXPORT_DPI, processes: int = 1) -> None:
+        """render every step offscreen with the Agg backend, as fast as the CPU allows, instead of a live animation
+
+        @:param path: an animated file (.gif via pillow, .mp4 etc. via ffmpeg), or a directory (no file extension)
+                      receiving one frame_XXXXX.png per step
+        @:param fps: frame rate of the animated file
+        @:param dpi: resolution of the frames
+        @:param processes: number of worker processes rendering the frames (frame directories only)
+        """
+        if os.path.splitext(path)[1] == "":  # frame sequence
+            os.makedirs(path, exist_ok=True)
+
+            # split the steps into contiguous ranges, one per worker process
+            jobs = [(self.signal_data_val, self.width, self.height, self.messages, path, int(steps[0]),
+                     int(steps[-1]) + 1, dpi)
+                    for steps in np.array_split(np.arange(self.frame_count), max(processes, 1)) if len(steps) > 0]
+
+            if len(jobs) > 1:
+                with Pool(processes=len(jobs)) as pool:
+                    pool.map(_export_frames, jobs)
+            else:
+                self.render_frames(directory=path, dpi=dpi)
+        else:
+            import matplotlib.style
+            from matplotlib.animation import FuncAnimation
+
+            self._counter_print = False
+
+            with matplotlib.style.context(STYLE):
+                figure = self.offscreen_figure()
+                self.init(figure.add_subplot())
+
+                # frames are drawn by step, the init function draws nothing (the animation saves every frame)
+                animation = FuncAnimation(figure, self.draw, frames=self.frame_count, init_func=lambda: self.artists,
+                                          repeat=False)
+                animation.save(path, fps=fps, dpi=dpi, writer="pillow" if path.endswith(".gif") else "ffmpeg")
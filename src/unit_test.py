@@ -5,6 +5,7 @@
 import unittest
 import stl.tool as tool
 import subprocess
+import sys
 import os
 
 # stl_path = os.getenv("STLPATH")
@@ -21,5 +22,770 @@ class Test_Example_Files(unittest.TestCase):
     #     subprocess.call(stl_path + "/stl/example/parsing/lex.sh")
     #     tool.print_success("LEXER TEST PASSED")
 
+
+class Test_Visualizer(unittest.TestCase):
+
+    def test_export_frames(self):
+        # the frames of a short mission are rendered offscreen (no display), split over worker processes
+        import tempfile
+        from src.obj.map import Coord
+        from src.obj.visualizer import FRAME_FILE_NAME
+        from src.mission.checkpoint import Checkpoint_Mission
+
+        result = Checkpoint_Mission(map_width=10, map_height=10, ego_init_loc=Coord(1, 5), chaser_init_loc=Coord(1, 1),
+                                    checkpoints=[Coord(5, 5)]).run(max_step=10)
+        self.assertEqual(result.steps, 4)  # 5 frames, the initial state and every step
+
+        for processes in (1, 2):
+            directory = tempfile.mkdtemp()
+            result.export(directory, dpi=10, processes=processes)
+            self.assertEqual(sorted(os.listdir(directory)), [FRAME_FILE_NAME % step for step in range(5)])
+
+        tool.print_success("VISUALIZER EXPORT TEST PASSED")
+
+    def test_incremental_draw(self):
+        # drawing a frame updates the artists created by init in place, rather than creating new ones
+        from src.obj.map import Coord
+        from src.obj.visualizer import Visualizer
+        from src.mission.checkpoint import Checkpoint_Mission
+
+        result = Checkpoint_Mission(map_width=10, map_height=10, ego_init_loc=Coord(1, 5), chaser_init_loc=Coord(1, 1),
+                                    checkpoints=[Coord(5, 5)]).run(max_step=10)
+        visual = Visualizer(signal_data=result.signal_data, width=10, height=10, messages=result.messages)
+        visual.init(Visualizer.offscreen_figure().add_subplot())
+        artists = visual.artists
+
+        first_frame = visual.draw(1)
+        first_data = [line.get_xydata().tolist() for line in first_frame[:-1]]
+        second_frame = visual.draw(2)
+
+        self.assertEqual(len(visual.artists), len(artists))
+        self.assertTrue(all(old is new for old, new in zip(artists, first_frame)))
+        self.assertTrue(all(old is new for old, new in zip(artists, second_frame)))
+        self.assertNotEqual([line.get_xydata().tolist() for line in second_frame[:-1]], first_data)
+        self.assertEqual(len(second_frame[0].get_xdata()), 3)  # the execution line covers steps 0 to 2
+        self.assertTrue(second_frame[-1].get_text().startswith("step #2"))
+        tool.print_success("VISUALIZER INCREMENTAL DRAW TEST PASSED")
+
+
+class Test_Coord(unittest.TestCase):
+
+    def test_value_type(self):
+        from src.obj.map import Coord
+        import pickle
+
+        self.assertEqual(len({Coord(1, 2), Coord(1, 2), Coord(2, 1)}), 2)
+        self.assertIs(Coord(3, 4), Coord(3, 4))  # small coordinates are interned
+        self.assertEqual(Coord(-5, 10000), Coord(-5, 10000))
+        self.assertEqual(pickle.loads(pickle.dumps(Coord(7, 8))), Coord(7, 8))
+        self.assertIn(Coord(0, 0), Coord(1, 1).neighbor)
+
+        with self.assertRaises(AttributeError):
+            Coord(1, 2).x = 3
+
+        tool.print_success("COORD TEST PASSED")
+
+
+class Test_Map(unittest.TestCase):
+
+    def test_map_cell(self):
+        from src.obj.map import Coord, Map
+
+        m = Map(2000, 2000)  # no map cell is materialized before it is requested
+        map_cell = m.map_cell(Coord(3, 4))
+
+        self.assertEqual((map_cell.x, map_cell.y), (3, 4))
+        self.assertIs(map_cell, m.map_cell_at(m.index(Coord(3, 4))))
+        self.assertFalse(m.check_bound(Coord(2000, 0)))
+        self.assertRaises(RuntimeError, m.map_cell, Coord(-1, 0))
+        tool.print_success("MAP CELL TEST PASSED")
+
+    def test_column(self):
+        from src.obj.map import Coord, Map
+        import numpy as np
+
+        m = Map(4, 3)
+        visited = m.add_column("visited", dtype=np.bool_, default=False)
+        visited[m.index(Coord(1, 2))] = True
+
+        self.assertEqual(m.column("visited").sum(), 1)
+        self.assertRaises(RuntimeError, m.add_column, "visited")
+        tool.print_success("MAP COLUMN TEST PASSED")
+
+    def test_layer(self):
+        from src.obj.map import Coord, Map
+        import numpy as np
+
+        m = Map(2000, 2000)
+        m.add_layer("cost", dtype=np.float32, default=1.0)
+        m.add_layer("threat", dtype=np.int8, default=0, sparse=True)
+
+        m.set_region("cost", 0, 0, 2, 2, 4.0)
+        mask = np.zeros((m.height, m.width), dtype=np.bool_)
+        mask[10, 10] = True
+        m.set_mask("threat", mask, 9)
+
+        self.assertEqual(m.get_region("cost", 1, 1, 3, 2).tolist(), [[4.0, 1.0]])
+        self.assertEqual(m.map_cell(Coord(10, 10)).get_attribute("threat"), 9)
+        self.assertEqual(len(m.layer("threat").values), 1)  # sparse layers only hold the cells set
+
+        # map cells are views into the layers, unknown attributes create sparse layers
+        map_cell = m.map_cell(Coord(5, 5))
+        self.assertIsNone(map_cell.get_attribute("visited"))
+        map_cell.set_attribute("visited", True)
+        self.assertTrue(m.get_attribute("visited", m.index(Coord(5, 5))))
+        self.assertFalse(m.map_cell(Coord(5, 6)).has_attribute("visited"))
+        self.assertIsNone(m.map_cell(Coord(5, 6)).get_attribute("visited"))
+
+        # the layers created on first set hold the zero of the value type elsewhere, and read back in bulk
+        m.set_attribute("height", m.index(Coord(1, 0)), 3)
+        m.set_attribute("slope", m.index(Coord(0, 1)), 0.5)
+        self.assertEqual(m.get_region("height", 0, 0, 2, 2).tolist(), [[0, 3], [0, 0]])
+        self.assertEqual(m.get_region("slope", 0, 0, 2, 2).tolist(), [[0.0, 0.0], [0.5, 0.0]])
+        self.assertEqual(m.get_region("visited", 5, 5, 6, 7).tolist(), [[True], [False]])
+        self.assertEqual(m.column("height").sum(), 3)
+        self.assertEqual(m.get_mask("visited", m.column("visited")).tolist(), [True])
+        tool.print_success("MAP LAYER TEST PASSED")
+
+    def test_neighbor(self):
+        from src.obj.map import Coord, Map
+
+        m = Map(5, 4)
+        corner = m.map_cell(Coord(0, 0))
+
+        self.assertEqual(list(m.find_neighbors_8(corner).keys()), ["south", "east", "southeast"])
+        self.assertEqual(list(m.find_neighbors_4(corner).keys()), ["south", "east"])
+        self.assertEqual(m.neighbor_indices(6).tolist(), [1, 11, 7, 5, 2, 12, 10, 0])
+        self.assertEqual(m.neighbor_table(4)[0].tolist(), [-1, 5, 1, -1])
+        tool.print_success("MAP NEIGHBOR TEST PASSED")
+
+
+class Test_Drone(unittest.TestCase):
+
+    def test_loc(self):
+        from src.obj.map import Coord, Map
+        from src.obj.drone import Drone
+
+        m = Map(10, 10)
+        d = Drone(id="Ego", map=m, init_loc=m.map_cell(Coord(0, 0)))
+        d.loc = m.map_cell(Coord(1, 1))
+        d.loc = m.map_cell(Coord(1, 1))  # the next coordinate can be itself
+
+        with self.assertRaises(RuntimeError):
+            d.loc = m.map_cell(Coord(3, 1))
+
+        self.assertEqual(d.loc.coord, Coord(1, 1))
+        tool.print_success("DRONE LOC TEST PASSED")
+
+    def test_validate_trajectory(self):
+        from src.obj.map import Coord, Map
+        from src.obj.drone import Drone
+        from src.obj.trajectory import Trajectory
+        import numpy as np
+
+        m = Map(10, 10)
+        d = Drone(id="Ego", map=m, init_loc=m.map_cell(Coord(0, 0)))
+
+        self.assertEqual(d.validate_trajectory(Trajectory.from_columns(np.array([[0, 1, 2, 2], [0, 1, 1, 0]]))), -1)
+        self.assertEqual(d.validate_trajectory(Trajectory.from_columns(np.array([[0, 1, 3, 4], [0, 1, 1, 1]]))), 2)
+        self.assertEqual(d.validate_trajectory(Trajectory.from_columns(np.array([[8, 9, 10], [0, 0, 0]]))), 2)
+        tool.print_success("DRONE TRAJECTORY VALIDATION TEST PASSED")
+
+
+class Test_Planner(unittest.TestCase):
+
+    def test_greedy_advance(self):
+        from src.obj.map import Coord, Map
+        from src.mission.planner import greedy_advance
+
+        m = Map(20, 20)
+        curr = [m.index(Coord(1, 10)), m.index(Coord(1, 1)), m.index(Coord(5, 5))]
+        target = [m.index(Coord(10, 19)), m.index(Coord(1, 10)), m.index(Coord(5, 5))]
+
+        # ego advances diagonally, chaser advances south, and a mover on its target remains in place
+        self.assertEqual(greedy_advance(m, curr, target).tolist(),
+                         [m.index(Coord(2, 11)), m.index(Coord(1, 2)), m.index(Coord(5, 5))])
+        tool.print_success("GREEDY PLANNER TEST PASSED")
+
+    def test_obstacle_mask(self):
+        # obstacles of a mission are written through the map (bumping its version), and the obstacle mask is computed
+        # once per map version
+        import numpy as np
+        from src.obj.map import Coord
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.planner import OBSTACLE_LAYER, AStar_Planner, obstacle_mask
+
+        cm = Checkpoint_Mission(map_width=10, map_height=10, ego_init_loc=Coord(1, 5), chaser_init_loc=Coord(1, 1),
+                                checkpoints=[Coord(8, 5)], obstacles=[Coord(5, 5)])
+        cm.init()
+        m = cm.map
+        version = m.version
+
+        mask = obstacle_mask(m)
+        self.assertEqual(np.flatnonzero(mask).tolist(), [m.index(Coord(5, 5))])
+        self.assertIs(obstacle_mask(m), mask)
+
+        # walling the goal in makes it unreachable, the path then holds the start only
+        m.set_region(OBSTACLE_LAYER, 7, 4, 10, 7, True)
+        m.set_attribute(OBSTACLE_LAYER, m.index(Coord(8, 5)), False)
+        self.assertGreater(m.version, version)
+        self.assertEqual(int(obstacle_mask(m).sum()), 9)
+        self.assertEqual(AStar_Planner().path(m, m.index(Coord(1, 5)), m.index(Coord(8, 5))), (m.index(Coord(1, 5)),))
+        tool.print_success("OBSTACLE MASK TEST PASSED")
+
+    def test_path_planner(self):
+        # behind a wall the greedy ego drone stalls, while the A* and JPS ego drones reach every checkpoint
+        from src.obj.map import Coord
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.planner import AStar_Planner, JPS_Planner
+
+        wall = [Coord(10, y) for y in range(0, 15)]
+        results = [Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 5),
+                                      chaser_init_loc=Coord(1, 1), checkpoints=[Coord(18, 5)], planner=planner,
+                                      obstacles=wall).run(max_step=60)
+                   for planner in (None, AStar_Planner(), JPS_Planner())]
+
+        self.assertFalse(results[0].complete)
+        self.assertTrue(results[1].complete and results[2].complete)
+        self.assertEqual(results[1].steps, results[2].steps)  # both planners find shortest paths
+
+        for result in results[1:]:
+            ego_x, ego_y = result.signal_data[0][1].columns
+            self.assertFalse(any(x == 10 and y < 15 for x, y in zip(ego_x.tolist(), ego_y.tolist())))
+
+        tool.print_success("PATH PLANNER TEST PASSED")
+
+    def test_field_planner(self):
+        # descending the euclidean field matches greedy_advance, the cost-to-go field finds its way around a wall
+        import numpy as np
+        from src.obj.map import Coord, Map
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.planner import OBSTACLE_LAYER, AStar_Planner, Field_Planner, greedy_advance
+
+        m = Map(15, 10)
+        rng = np.random.default_rng(0)
+        m.add_layer(OBSTACLE_LAYER, dtype=np.bool_, default=False)
+        m.set_mask(OBSTACLE_LAYER, rng.random(m.size) < 0.2, True)
+        curr, target = rng.integers(0, m.size, size=50), rng.integers(0, m.size, size=50)
+
+        # half of the targets get a field, the other half is scored on the fly
+        planner = Field_Planner()
+        planner.prepare(m, target[:25])
+        self.assertEqual(planner.advance(m, curr, target).tolist(), greedy_advance(m, curr, target).tolist())
+        self.assertEqual(planner.field(m, int(target[0])).dtype, np.int32)
+
+        # so does a whole mission, against the default (greedy) planner
+        results = [Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10),
+                                      chaser_init_loc=Coord(1, 1), checkpoints=[Coord(10, 19), Coord(19, 1)],
+                                      planner=planner).run(max_step=60)
+                   for planner in (None, Field_Planner())]
+        self.assertEqual(results[0].signal_data[0][1].columns.tolist(), results[1].signal_data[0][1].columns.tolist())
+        self.assertEqual(results[0].step_robustness, results[1].step_robustness)
+
+        # the goals of a previous preparation (e.g. mission) are no longer planned with a field
+        planner.prepare(m, target[25:])
+        computed = planner.computed
+        planner.advance(m, curr[:25], target[:25] + 1000)
+        self.assertEqual(planner.computed, computed)
+
+        # the cost-to-go matches the shortest paths, which never squeeze diagonally between two obstacles
+        planner, astar = Field_Planner(kind="cost_to_go"), AStar_Planner()
+        goal = int(np.flatnonzero(~m.column(OBSTACLE_LAYER))[-1])
+        planner.prepare(m, np.array([goal]))
+        field = planner.field(m, goal)
+        for start in np.flatnonzero(~m.column(OBSTACLE_LAYER)).tolist():
+            path = astar.path(m, start, goal)
+            if path[-1] != goal:
+                self.assertEqual(field[start], np.inf)
+                continue
+
+            x, y = m.indices_to_xy(np.array(path))
+            self.assertAlmostEqual(field[start], np.hypot(np.diff(x), np.diff(y)).sum())
+
+            curr = np.array([start])
+            for _ in range(len(path) - 1):
+                curr = planner.advance(m, curr, np.array([goal]))
+            self.assertEqual(curr.tolist(), [goal])
+
+        m = Map(3, 3)
+        m.add_layer(OBSTACLE_LAYER, dtype=np.bool_, default=False)
+        m.set_mask(OBSTACLE_LAYER, np.isin(np.arange(m.size), [m.index(Coord(1, 0)), m.index(Coord(0, 1))]), True)
+        planner = Field_Planner(kind="cost_to_go")
+        planner.prepare(m, np.array([m.index(Coord(1, 1))]))
+        self.assertEqual(planner.field(m, m.index(Coord(1, 1)))[m.index(Coord(0, 0))], np.inf)
+        self.assertEqual(planner.advance(m, np.array([0]), np.array([m.index(Coord(1, 1))])).tolist(), [0])
+
+        wall = [Coord(10, y) for y in range(0, 15)]
+        result = Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 5), chaser_init_loc=Coord(1, 1),
+                                    checkpoints=[Coord(18, 5)], planner=Field_Planner(kind="cost_to_go"),
+                                    obstacles=wall).run(max_step=60)
+        self.assertTrue(result.complete)
+        tool.print_success("FIELD PLANNER TEST PASSED")
+
+
+class Test_Trajectory(unittest.TestCase):
+
+    def test_append(self):
+        from src.obj.trajectory import Trajectory
+
+        t = Trajectory(capacity=1)
+        for step in range(5):  # grows beyond the preallocated capacity
+            t.append(step, 2 * step)
+
+        self.assertEqual(len(t), 5)
+        self.assertEqual(t.lookup("y"), [0, 2, 4, 6, 8])
+        self.assertEqual(t.get(1, 2).lookup("x"), [1, 2])
+        self.assertEqual(t.to_signal().lookup("x"), t.lookup("x"))
+        tool.print_success("TRAJECTORY TEST PASSED")
+
+
+class Test_Checkpoint(unittest.TestCase):
+
+    def test_steps(self):
+        # the streamed step records match the accumulated execution, and iterating may stop at any step
+        from src.obj.map import Coord
+        from src.mission.checkpoint import Checkpoint_Mission
+
+        cm = Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10), chaser_init_loc=Coord(1, 1),
+                                checkpoints=[Coord(10, 19), Coord(19, 1)])
+        result = cm.run(max_step=60)
+
+        cm.init()
+        records = list(cm.steps(max_step=60))
+        self.assertEqual([record.message for record in records], result.messages[:-1])
+        self.assertEqual([record.robustness for record in records], result.step_robustness)
+        self.assertEqual([(record.ego_loc.x, record.ego_loc.y) for record in records],
+                         list(zip(*result.signal_data[0][1].columns.tolist()))[1:])
+
+        cm.init()
+        first_conflict = next(record for record in cm.steps(max_step=60) if record.conflict)
+        self.assertEqual(first_conflict.step, result.first_conflict)
+        self.assertEqual(cm._ego_drone.loc.coord, first_conflict.ego_loc)  # no step executed beyond the conflict
+        tool.print_success("CHECKPOINT STEPS TEST PASSED")
+
+    def test_search_conflicts(self):
+        # the search stops at the k-th conflicting step, with the predictive signals of the full run as witness
+        from src.obj.map import Coord
+        from src.mission.checkpoint import Checkpoint_Mission
+
+        cm = Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10), chaser_init_loc=Coord(1, 1),
+                                checkpoints=[Coord(10, 19), Coord(19, 1)])
+        result = cm.run(max_step=60)
+        conflict_steps = [step for step, conflict in enumerate(result.step_conflict) if conflict]
+
+        search = cm.search_conflicts(max_step=60, k=3)
+        self.assertEqual([witness.step for witness in search.witnesses], conflict_steps[:3])
+        self.assertEqual(search.steps, conflict_steps[2] + 1)
+        self.assertIsNone(search.witnesses[0].message)
+
+        witness = search.witnesses[0]
+        ego_pred_signals, chaser_pred_signals = result.signal_data[0][2], result.signal_data[1][2]
+        self.assertEqual(witness.pred_ego.columns.tolist(), ego_pred_signals[witness.step].columns.tolist())
+        self.assertEqual(witness.pred_chaser.columns.tolist(), chaser_pred_signals[witness.step].columns.tolist())
+
+        for k in (0, -1):
+            self.assertRaises(RuntimeError, cm.search_conflicts, max_step=60, k=k)
+        tool.print_success("CONFLICT SEARCH TEST PASSED")
+
+    def test_rollout_cache(self):
+        # memoized and suffix-extended rollouts match fresh uncached ones, the LRU evicts beyond its size, and a map
+        # edit clears the memo
+        from unittest import mock
+        import numpy as np
+        from src.obj.map import Coord
+        from src.instrument import Instrument
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.planner import OBSTACLE_LAYER
+
+        def fresh_rollout(cm, ego_index, chaser_index, heading_index, pred_step):
+            ego_indices, chaser_indices = [ego_index], [chaser_index]
+            for _ in range(pred_step):
+                ego_index, chaser_index = cm.state_planner_indices(ego_index, chaser_index, heading_index)
+                ego_indices.append(ego_index)
+                chaser_indices.append(chaser_index)
+            return tuple(ego_indices), tuple(chaser_indices)
+
+        instrument = Instrument()
+        cm = Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10), chaser_init_loc=Coord(1, 1),
+                                checkpoints=[Coord(10, 19), Coord(19, 1)], instrument=instrument)
+        cm.init()
+        m = cm.map
+        heading = m.index(Coord(10, 19))
+
+        rollout = cm.rollout(m.index(Coord(1, 10)), m.index(Coord(1, 1)), heading, 6)
+        self.assertEqual(rollout, fresh_rollout(cm, m.index(Coord(1, 10)), m.index(Coord(1, 1)), heading, 6))
+
+        # the second state of the previous rollout only plans the last state
+        suffix = cm.rollout(rollout[0][1], rollout[1][1], heading, 6)
+        self.assertEqual(instrument.counters["rollout_suffix_reuse"], 1)
+        self.assertEqual(instrument.counters["planner_call"], 7)
+        self.assertEqual(suffix, fresh_rollout(cm, rollout[0][1], rollout[1][1], heading, 6))
+
+        self.assertIs(cm.rollout(m.index(Coord(1, 10)), m.index(Coord(1, 1)), heading, 6), rollout)
+        self.assertEqual(instrument.counters["rollout_cache_hit"], 1)
+
+        # beyond ROLLOUT_CACHE_SIZE entries, the least recently used rollout is evicted
+        with mock.patch("src.mission.checkpoint.ROLLOUT_CACHE_SIZE", 2):
+            cm.rollout(m.index(Coord(5, 5)), m.index(Coord(1, 1)), heading, 3)
+            self.assertEqual(len(cm._rollout_cache), 2)
+            self.assertNotIn((rollout[0][1], rollout[1][1], heading, 6), cm._rollout_cache)
+
+        # an obstacle written through the map bumps its version, which clears the memo
+        m.add_layer(OBSTACLE_LAYER, dtype=np.bool_, default=False)
+        m.set_mask(OBSTACLE_LAYER, np.arange(m.size) == m.index(Coord(2, 11)), True)
+        rerouted = cm.rollout(m.index(Coord(1, 10)), m.index(Coord(1, 1)), heading, 6)
+        self.assertEqual(len(cm._rollout_cache), 1)
+        self.assertEqual(rerouted, fresh_rollout(cm, m.index(Coord(1, 10)), m.index(Coord(1, 1)), heading, 6))
+        self.assertNotEqual(rerouted, rollout)
+
+        # once cleared, a repeated rollout is planned from scratch again
+        cm.clear_rollout_cache()
+        calls = instrument.counters["planner_call"]
+        self.assertIsNot(cm.rollout(m.index(Coord(1, 10)), m.index(Coord(1, 1)), heading, 6), rerouted)
+        self.assertEqual(instrument.counters["planner_call"], calls + 6)
+        tool.print_success("ROLLOUT CACHE TEST PASSED")
+
+
+class Test_Property(unittest.TestCase):
+
+    def test_compile_props(self):
+        # properties given as formula text or as compiled STL evaluate as the default boundary properties, and text
+        # is compiled once then served from the cache
+        from src.obj.map import Coord
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.property import boundary_props, compile_prop, compile_props
+
+        formulas = ["G[0, 4](x < 17)", "G[0, 4](y < 17)", "G[0, 4](x > 3)", "G[0, 4](y > 3)"]
+        compiled = compile_props(formulas)
+        self.assertEqual(compiled, boundary_props(map_width=20, map_height=20, pred_step=4))  # the same objects
+
+        hits = compile_prop.cache_info().hits
+        self.assertIs(compile_props(formulas[:1])[0], compiled[0])
+        self.assertEqual(compile_prop.cache_info().hits, hits + 1)
+
+        results = [Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10),
+                                      chaser_init_loc=Coord(1, 1),
+                                      checkpoints=[Coord(10, 19), Coord(19, 1)]).run(max_step=60, pred_step=4, prop=prop)
+                   for prop in (None, formulas, compiled, [compiled[0]] + formulas[1:])]
+
+        for result in results[1:]:
+            self.assertEqual(result.step_robustness, results[0].step_robustness)
+            self.assertEqual(result.step_conflict, results[0].step_conflict)
+
+        tool.print_success("COMPILE PROPS TEST PASSED")
+
+    def test_batch_eval(self):
+        # every cell of the batched matrices matches the single-pair STL-API evaluation, for properties evaluated in
+        # their bound form as well as by the STL-API (a plain STL, or a window past the end of a signal)
+        import numpy as np
+        from stl.api import STL
+        from src.obj.trajectory import Trajectory
+        from src.mission.property import batch_eval, compile_props
+
+        rng = np.random.default_rng(0)
+        signals = [Trajectory.from_columns(rng.integers(0, 20, size=(2, 6))) for _ in range(4)]
+        signals.append(signals[0].to_signal())
+        props = compile_props(["G[0, 5](x < 17)", "G[1, 3](y > 3)", "G[2, 2](x > 10)", "G[0, 8](y < 15)"])
+        props.append(STL("G[0, 5](y < 12)"))
+
+        for time in (0, 1):
+            prop_eval = batch_eval(props, signals, time=time)
+            self.assertEqual(prop_eval.robustness.shape, (5, 5))
+
+            for i, curr_prop in enumerate(props):
+                for j, signal in enumerate(signals):
+                    single_eval = curr_prop.eval(time, signal.to_signal() if isinstance(signal, Trajectory) else signal)
+                    self.assertEqual(prop_eval.satisfy[i, j], single_eval.satisfy)
+                    self.assertEqual(prop_eval.robustness[i, j], single_eval.robustness)
+
+        tool.print_success("BATCH EVAL TEST PASSED")
+
+
+class Test_Sweep(unittest.TestCase):
+
+    def test_sweep(self):
+        # the summary table is ordered by scenario and matches running each scenario serially, as does the CSV of the
+        # command line
+        import contextlib
+        import csv
+        import io
+        from src.mission.sweep import Scenario, main, run_scenario, sweep
+
+        scenarios = [Scenario(map_width=10, map_height=10, ego_init_loc=ego_init_loc, chaser_init_loc=(1, 1),
+                              checkpoints=((5, 9), (9, 1)), pred_step=3)
+                     for ego_init_loc in ((1, 5), (8, 8))]
+
+        table = sweep(scenarios, processes=1)
+        self.assertEqual(table["scenario"].tolist(), [0, 1])
+        for row, scenario in zip(table.tolist(), scenarios):
+            self.assertEqual(row[1:], run_scenario(scenario))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(["--map-size", "10x10", "--ego", "1,5", "8,8", "--checkpoints", "5,9;9,1", "--pred-step", "3",
+                  "--processes", "1"])
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual([row["ego_init_loc"] for row in rows], ["1,5", "8,8"])
+        self.assertEqual([int(row["steps"]) for row in rows], table["steps"].tolist())
+
+        # conflict-search mode requires at least one conflicting step
+        self.assertRaises(RuntimeError, sweep, scenarios, processes=1, search=0)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertRaises(SystemExit, main, ["--search", "0", "--processes", "1"])
+        tool.print_success("SWEEP TEST PASSED")
+
+
+class Test_Monitor(unittest.TestCase):
+
+    def test_sliding_min(self):
+        import numpy as np
+        from src.mission.monitor import Sliding_Min
+
+        values = np.random.default_rng(0).integers(-50, 50, size=200).tolist()
+        sliding_min = Sliding_Min(window=7)
+        for position, value in enumerate(values):
+            sliding_min.push(value)
+            self.assertEqual(sliding_min.min, min(values[max(0, position - 6):position + 1]))
+
+        tool.print_success("SLIDING MIN TEST PASSED")
+
+    def test_update_window(self):
+        # the robustness of the sliding windows matches the STL-API and batch_eval over every window, through slides
+        # and through refills (a new plan, a skipped step)
+        import numpy as np
+        from src.obj.trajectory import Trajectory
+        from src.mission.monitor import Boundary_Monitor
+        from src.mission.property import batch_eval, boundary_props
+
+        horizon = 4
+        rng = np.random.default_rng(0)
+        paths = [rng.integers(0, 20, size=(2, 40)) for _ in range(2)]
+        props = boundary_props(map_width=20, map_height=20, pred_step=horizon)
+        monitor = Boundary_Monitor.boundary(map_width=20, map_height=20, horizon=horizon)
+
+        # (step, plan) of every window, the window of a plan at a step starts at the step of its path
+        schedule = [(step, 0) for step in range(10)] + [(step, 1) for step in range(10, 20)] + \
+                   [(step, 1) for step in range(25, 30)]
+        slides = 0
+        for step, plan in schedule:
+            window = paths[plan][:, step:step + horizon + 1]
+            slides += monitor.update_window(window, step=step, plan=plan)
+
+            signal = Trajectory.from_columns(window)
+            self.assertEqual(monitor.robustness.tolist(),
+                             [curr_prop.eval(0, signal.to_signal()).robustness for curr_prop in props])
+            self.assertEqual(monitor.robustness.tolist(), batch_eval(props, [signal]).robustness[:, 0].tolist())
+
+        self.assertEqual(slides, len(schedule) - 3)
+        tool.print_success("UPDATE WINDOW TEST PASSED")
+
+    def test_mission_monitor(self):
+        # monitoring the boundary properties online yields the same per-step evaluation as the STL-API
+        from src.obj.map import Coord
+        from src.instrument import Instrument
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.property import batch_eval, boundary_props
+
+        for pred_step in (0, 4, 12):
+            results = [Checkpoint_Mission(map_width=30, map_height=17, ego_init_loc=Coord(25, 3),
+                                          chaser_init_loc=Coord(2, 15),
+                                          checkpoints=[Coord(0, 0), Coord(29, 16), Coord(15, 8)],
+                                          monitor=monitor).run(max_step=60, pred_step=pred_step)
+                       for monitor in (False, True)]
+
+            self.assertEqual(results[0].messages, results[1].messages)
+            self.assertEqual(results[0].step_robustness, results[1].step_robustness)
+            self.assertEqual(results[0].step_conflict, results[1].step_conflict)
+
+            # every monitored step matches batch_eval over its own predictive signals, most windows sliding
+            instrument = Instrument()
+            cm = Checkpoint_Mission(map_width=30, map_height=17, ego_init_loc=Coord(25, 3),
+                                    chaser_init_loc=Coord(2, 15),
+                                    checkpoints=[Coord(0, 0), Coord(29, 16), Coord(15, 8)],
+                                    monitor=True, instrument=instrument)
+            cm.init()
+            props = boundary_props(map_width=30, map_height=17, pred_step=pred_step)
+            records = list(cm.steps(max_step=60, pred_step=pred_step))
+            for record in records:
+                prop_eval = batch_eval(props, [record.pred_ego, record.pred_chaser])
+                self.assertEqual([record.robustness_ego, record.robustness_chaser], prop_eval.min_robustness.tolist())
+                self.assertEqual([record.satisfy_ego, record.satisfy_chaser], prop_eval.satisfy_all.tolist())
+
+            self.assertGreaterEqual(instrument.counters["monitor_slide"], 2 * (len(records) - 3))
+
+        tool.print_success("MISSION MONITOR TEST PASSED")
+
+
+class Test_Swarm(unittest.TestCase):
+
+    def test_ego_chaser_pair(self):
+        # a swarm of an ego drone and its chaser flies the same trajectories as the checkpoint mission
+        from src.obj.map import Coord
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.swarm import Swarm_Mission
+
+        # to completion, and stopped by max_step (max_step + 1 steps, or max_step when a checkpoint is reached on the
+        # last step of the budget, as in the last scenario)
+        scenarios = [((20, 20), Coord(1, 10), Coord(1, 1), [Coord(10, 19), Coord(19, 1)], max_step, 4)
+                     for max_step in (100, 10, 0)]
+        scenarios.append(((13, 24), Coord(4, 2), Coord(6, 9), [Coord(9, 2), Coord(10, 16), Coord(3, 9), Coord(1, 18)],
+                          26, 1))
+        for (width, height), ego_init_loc, chaser_init_loc, checkpoints, max_step, pred_step in scenarios:
+            result = Checkpoint_Mission(map_width=width, map_height=height, ego_init_loc=ego_init_loc,
+                                        chaser_init_loc=chaser_init_loc,
+                                        checkpoints=checkpoints).run(max_step=max_step, pred_step=pred_step)
+
+            sm = Swarm_Mission(map_width=width, map_height=height)
+            ego = sm.add_checkpoint_drone("Ego", ego_init_loc, checkpoints)
+            sm.add_chaser_drone("Chaser", chaser_init_loc, target=ego)
+            sm.init()
+            signal_data = sm.execute(max_step=max_step, pred_step=pred_step)
+
+            self.assertEqual(len(signal_data[0][1]), result.steps + 1)
+            for (id_val, exe_signal, pred_signals), (swarm_id, swarm_exe_signal, swarm_pred_signals) in \
+                    zip(result.signal_data, signal_data):
+                self.assertEqual(id_val, swarm_id)
+                self.assertEqual(exe_signal.columns.tolist(), swarm_exe_signal.columns.tolist())
+                self.assertEqual([pred_signal.columns.tolist() for pred_signal in pred_signals],
+                                 [pred_signal.columns.tolist() for pred_signal in swarm_pred_signals])
+
+            self.assertEqual(sm.complete, result.complete)
+        tool.print_success("SWARM TEST PASSED")
+
+
+class Test_Spatial_Index(unittest.TestCase):
+
+    def test_queries(self):
+        # the bucketed queries agree with brute force over every drone, after incremental moves
+        import numpy as np
+        from src.obj.map import Map
+        from src.obj.map_util.spatial_index import Spatial_Index
+
+        rng = np.random.default_rng(0)
+        index = Spatial_Index(Map(50, 50), bucket_size=4)
+
+        for _ in range(5):
+            x, y = rng.integers(0, 50, size=40), rng.integers(0, 50, size=40)
+            index.update_all(x, y)
+            distance = np.hypot(x - 25, y - 20)
+
+            self.assertEqual(index.within_radius(25, 20, 9), np.flatnonzero(distance <= 9).tolist())
+            self.assertEqual(index.k_nearest(25, 20, 5), np.lexsort((np.arange(40), distance))[:5].tolist())
+
+            pairs = [(i, j) for i in range(40) for j in range(i + 1, 40) if np.hypot(x[i] - x[j], y[i] - y[j]) <= 3]
+            report = index.proximity_report(collision_radius=0, near_miss_radius=3)
+            self.assertEqual(sorted(report.collisions + report.near_misses), pairs)
+            self.assertTrue(all(x[i] == x[j] and y[i] == y[j] for i, j in report.collisions))
+
+        self.assertEqual(index.k_nearest(25, 20, 0), [])
+        self.assertEqual(index.k_nearest(25, 20, -1), [])
+
+        tool.print_success("SPATIAL INDEX TEST PASSED")
+
+
+class Test_Instrument(unittest.TestCase):
+
+    def test_mission_report(self):
+        # an instrumented run reports every phase once per step, the default null instrument records nothing
+        import io
+        import json
+        from src.obj.map import Coord
+        from src.instrument import NULL_INSTRUMENT, Instrument
+        from src.mission.checkpoint import Checkpoint_Mission
+
+        instrument = Instrument()
+        result = Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10), chaser_init_loc=Coord(1, 1),
+                                    checkpoints=[Coord(10, 19), Coord(19, 1)], instrument=instrument).run()
+
+        for phase in ("predict", "stl_eval", "message", "plan", "move", "append"):
+            self.assertEqual(instrument.calls[phase], result.steps)
+        self.assertEqual(instrument.counters["step"], result.steps)
+        self.assertEqual(instrument.counters["conflict_step"], result.conflicts)
+
+        output = io.StringIO()
+        instrument.export(output)
+        self.assertEqual(json.loads(output.getvalue())["counters"]["run"], 1)
+
+        Checkpoint_Mission(map_width=20, map_height=20, ego_init_loc=Coord(1, 10), chaser_init_loc=Coord(1, 1),
+                           checkpoints=[Coord(10, 19), Coord(19, 1)]).run()
+        self.assertEqual(NULL_INSTRUMENT.report(), {"total": 0, "phases": dict(), "counters": dict()})
+        tool.print_success("INSTRUMENT TEST PASSED")
+
+
+class Test_Benchmark(unittest.TestCase):
+
+    def test_report(self):
+        # the report holds the timings of the selected benchmarks, and the comparison flags slowdowns only
+        from src.benchmark import BENCHMARKS, compare, run_benchmarks
+
+        benchmarks = [benchmark for benchmark in BENCHMARKS if benchmark.name.startswith("map_construction")]
+        report = run_benchmarks(benchmarks, repeat=1)
+        self.assertEqual(sorted(report["results"]), ["map_construction[1000x1000]", "map_construction[100x100]",
+                                                     "map_construction[20x20]"])
+
+        baseline = {"results": {name: {"best": result["best"] * 2} for name, result in report["results"].items()}}
+        self.assertEqual(compare(report, baseline), dict())
+        self.assertEqual(sorted(compare(baseline, report)), sorted(report["results"]))
+        tool.print_success("BENCHMARK TEST PASSED")
+
+
+class Test_Trace(unittest.TestCase):
+
+    def test_round_trip(self):
+        import os
+        import tempfile
+        from src.obj.map import Coord
+        from src.mission.checkpoint import Checkpoint_Mission
+        from src.mission.trace import Trace_Reader, Trace_Writer
+
+        results = [Checkpoint_Mission(map_width=30, map_height=17, ego_init_loc=Coord(25, 3),
+                                      chaser_init_loc=Coord(2, 15),
+                                      checkpoints=[Coord(0, 0), Coord(29, 16), Coord(15, 8)]).run(max_step=max_step,
+                                                                                                  pred_step=pred_step)
+                   for max_step, pred_step in ((60, 0), (60, 4), (10, 12))]
+
+        path = os.path.join(tempfile.mkdtemp(), "runs.trace")
+        with Trace_Writer(path) as writer:
+            for result in results:
+                writer.write(result)
+
+        # an archive interrupted before its index is written is read by walking the run chunks
+        truncated_path = path + ".truncated"
+        with open(path, "rb") as archive, open(truncated_path, "wb") as truncated:
+            truncated.write(archive.read()[:-8 * len(results) - 20])
+
+        for archive_path in (path, truncated_path):
+            with Trace_Reader(archive_path) as reader:
+                self.assertEqual(len(reader), len(results))
+
+                for index in reversed(range(len(results))):  # random access to single runs
+                    expected, loaded = results[index], reader.result(index)
+                    self.assertEqual(loaded.messages, expected.messages)
+                    self.assertEqual(loaded.step_robustness, expected.step_robustness)
+                    self.assertEqual(loaded.step_conflict, expected.step_conflict)
+                    self.assertEqual((loaded.complete, loaded.width, loaded.height),
+                                     (expected.complete, expected.width, expected.height))
+
+                    for (id_val, exe_signal, pred_signals), (expected_id, expected_exe, expected_preds) in \
+                            zip(loaded.signal_data, expected.signal_data):
+                        self.assertEqual(id_val, expected_id)
+                        self.assertEqual(exe_signal.columns.tolist(), expected_exe.columns.tolist())
+                        self.assertEqual([pred_signal.columns.tolist() for pred_signal in pred_signals],
+                                         [pred_signal.columns.tolist() for pred_signal in expected_preds])
+
+        tool.print_success("TRACE ROUND TRIP TEST PASSED")
+
+
+class Test_Import(unittest.TestCase):
+
+    def test_lazy_matplotlib(self):
+        # mission code must not pull in matplotlib until rendering is requested
+        code = "import sys, src.mission.checkpoint, src.obj.visualizer; print('matplotlib' in sys.modules)"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(__file__)))
+
+        self.assertEqual(output.decode().strip(), "False")
+        tool.print_success("LAZY IMPORT TEST PASSED")
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file